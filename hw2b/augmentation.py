@@ -0,0 +1,185 @@
+"""
+Data augmentation in the spectral domain.
+
+A clip is decoded and transformed once; every augmented copy is derived from
+its cached Mel power spectrograms with elementwise numpy operations and pooled
+exactly like FeatureEngine.feature_blocks. Since the Mel projection is linear,
+gain, white noise, time shifts and masks can all be applied after it, so an
+extra row costs a fraction of extracting the clip again.
+"""
+
+import numpy as np
+from feature_engine import FeatureEngine, mel_basis
+from profiling import profiler
+
+def noise_moments(basis, power):
+    """
+    Gamma approximation of white noise seen through a Mel filterbank.
+
+    The STFT power of white noise is exponentially distributed per bin, and a
+    Mel band is a weighted sum of bins. A Gamma distribution with the same mean
+    (power * sum w) and variance (power^2 * sum w^2) stands in for it, so noise
+    can be drawn per band without projecting a full noise spectrogram.
+
+    Returns:
+        shape, scale: Per-band Gamma parameters, arrays of len(basis)
+    """
+    basis = basis.astype(np.float64)
+    total = basis.sum(axis=1)
+    squares = (basis ** 2).sum(axis=1)
+    # Empty filters get no noise at all
+    shape = np.where(squares > 0, total ** 2 / np.maximum(squares, 1e-30), 1.0)
+    return shape, power * total / shape
+
+class SpectralAugmenter:
+    """
+    Generates augmented feature rows per clip: time shift, gain, white noise
+    mixing, frequency and time masking, and (across clips) feature mixup.
+    Every random draw comes from a generator seeded with (seed, clip index),
+    so the rows are reproducible and do not depend on n_jobs.
+    """
+
+    def __init__(self, n_augment=10, max_shift=0.2, gain_db=6.0, snr_db=(10.0, 40.0), freq_mask=8, time_mask=0.1, n_mixup=0, mixup_alpha=0.4, seed=0):
+        """
+        Args:
+            n_augment: Augmented rows per clip, on top of the clip's own row
+            max_shift: Up to this fraction of the frames is dropped from the
+                start or the end of the clip (the pooled features do not
+                change under a circular shift, so a shift is a crop here)
+            gain_db: Gain drawn uniformly in [-gain_db, gain_db] dB
+            snr_db: (low, high) signal-to-noise ratio of the mixed-in white
+                noise, drawn uniformly in dB; None disables noise
+            freq_mask: Up to this many of MFCC_N_MELS Mel bands are masked
+                (scaled for other band counts)
+            time_mask: Up to this fraction of the frames is masked
+            n_mixup: Extra rows per clip made by mixup(), each mixing one of
+                the clip's rows with a row of another clip of the same class,
+                so labels stay hard
+            mixup_alpha: Mixing weights are drawn from Beta(mixup_alpha, mixup_alpha)
+            seed: Random seed
+        """
+        self.n_augment = n_augment
+        self.max_shift = max_shift
+        self.gain_db = gain_db
+        self.snr_db = snr_db
+        self.freq_mask = freq_mask
+        self.time_mask = time_mask
+        self.n_mixup = n_mixup
+        self.mixup_alpha = mixup_alpha
+        self.seed = seed
+
+    def clip_rng(self, index):
+        return np.random.default_rng([self.seed, 0, index])
+
+    def spectrograms(self, engine, y, sr, n_mels=128):
+        """
+        The per-clip cache every row of the clip is derived from, computed
+        from a single STFT.
+
+        Returns:
+            Dictionary with mel and mfcc_mel (see FeatureEngine.mel_power) and
+            the Gamma noise parameters of both at 0 dB SNR
+        """
+        with profiler.timer('stft'):
+            S = engine.power_spectrogram(y)
+        mel, mfcc_mel = engine.mel_power(S, sr, n_mels)
+
+        # White noise at 0 dB SNR has the clip's mean power in every STFT bin
+        power = float(S.mean())
+        return {
+            'mel': mel,
+            'mfcc_mel': mfcc_mel,
+            'mel_noise': noise_moments(mel_basis(sr, engine.n_fft, n_mels), power),
+            'mfcc_noise': noise_moments(mel_basis(sr, engine.n_fft, FeatureEngine.MFCC_N_MELS), power),
+        }
+
+    def augment(self, spectrograms, rng):
+        """
+        One random augmentation of a clip.
+
+        Returns:
+            mel, mfcc_mel: Augmented Mel power spectrograms (the same array
+            when the cache shares them)
+        """
+        mel, mfcc_mel = spectrograms['mel'], spectrograms['mfcc_mel']
+        shared = mfcc_mel is mel
+        n_frames = mel.shape[1]
+
+        # Time shift: keep a contiguous run of frames, dropping the rest at one end
+        drop = int(rng.integers(0, int(self.max_shift * n_frames) + 1))
+        start = drop if rng.random() < 0.5 else 0
+        frames = slice(start, start + n_frames - drop)
+
+        gain = 10.0 ** (rng.uniform(-self.gain_db, self.gain_db) / 10.0)
+        noise_level = None if self.snr_db is None else 10.0 ** (-rng.uniform(*self.snr_db) / 10.0)
+
+        def mix(spec, noise):
+            spec = spec[:, frames] * gain
+            if noise_level is not None:
+                shape, scale = noise
+                spec += rng.gamma(shape[:, None], scale[:, None] * noise_level, size=spec.shape)
+            return spec
+
+        mel = mix(mel, spectrograms['mel_noise'])
+        mfcc_mel = mel if shared else mix(mfcc_mel, spectrograms['mfcc_noise'])
+
+        # SpecAugment-style masks, filled with the mean power so pooling sees no artificial silence
+        n_frames = mel.shape[1]
+        width = int(rng.integers(0, self.freq_mask + 1)) / FeatureEngine.MFCC_N_MELS
+        low = rng.uniform(0.0, 1.0 - width)
+        t_width = int(rng.integers(0, int(self.time_mask * n_frames) + 1))
+        t_start = int(rng.integers(0, n_frames - t_width + 1))
+        for spec in ([mel] if shared else [mel, mfcc_mel]):
+            n_bands = spec.shape[0]
+            fill = spec.mean()
+            spec[int(round(low * n_bands)):int(round((low + width) * n_bands))] = fill
+            spec[:, t_start:t_start + t_width] = fill
+
+        return mel, mfcc_mel
+
+    def clip_blocks(self, engine, y, sr, rng, n_mfcc=128, n_mels=128):
+        """
+        Feature blocks of a clip and of n_augment augmentations of it.
+
+        Returns:
+            List of 1 + n_augment block dictionaries, the clip's own first
+        """
+        spectrograms = self.spectrograms(engine, y, sr, n_mels)
+        blocks = [engine.pooled_blocks(*engine.mel_db_and_mfcc(spectrograms['mel'], spectrograms['mfcc_mel'], n_mfcc))]
+        for _ in range(self.n_augment):
+            with profiler.timer('augment'):
+                mel, mfcc_mel = self.augment(spectrograms, rng)
+            blocks.append(engine.pooled_blocks(*engine.mel_db_and_mfcc(mel, mfcc_mel, n_mfcc)))
+        profiler.count('rows augmented', self.n_augment)
+        return blocks
+
+    def mixup(self, X, y, groups):
+        """
+        n_mixup rows per clip: lam * (a row of the clip) + (1 - lam) * (a row
+        of another clip of the same class). A mixed row carries features of
+        two clips, so only call this on the rows of a training split, after
+        splitting (AudioClassifier.train does): partners are drawn from the
+        rows passed in, and no held-out clip can leak into a mixed row.
+
+        Args:
+            X, y: Feature rows and labels of the training split
+            groups: Source clip index of every row
+
+        Returns:
+            X_mix, y_mix, groups_mix
+        """
+        rng = np.random.default_rng([self.seed, 1])
+        rows, partners = [], []
+        for group in np.unique(groups):
+            own = np.flatnonzero(groups == group)
+            others = np.flatnonzero((y == y[own[0]]) & (groups != group))
+            if len(others) == 0:
+                continue
+            rows.append(rng.choice(own, self.n_mixup))
+            partners.append(rng.choice(others, self.n_mixup))
+
+        if not rows:
+            return X[:0], y[:0], groups[:0]
+        rows, partners = np.concatenate(rows), np.concatenate(partners)
+        lam = rng.beta(self.mixup_alpha, self.mixup_alpha, len(rows))[:, None]
+        return lam * X[rows] + (1.0 - lam) * X[partners], y[rows], groups[rows]
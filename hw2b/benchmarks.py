@@ -0,0 +1,787 @@
+"""
+Benchmarks for the hw2b pipeline on synthetic corpora (see synthetic_data.py).
+
+Usage:
+    python benchmarks.py loading --n-files 600
+    python benchmarks.py report --n-files 50 --json report.json --baseline previous.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import librosa
+import numpy as np
+import soundfile as sf
+from sklearn.datasets import make_classification
+from sklearn.model_selection import train_test_split
+from augmentation import SpectralAugmenter
+from classifier import AudioClassifier
+from data_loader import DataLoader
+from inference import ForestModel
+from segmenter import SegmentClassifier
+from streaming import StreamingClassifier
+from synthetic_data import CLASS_RECIPES, generate_corpus, synthesize_clip
+
+def benchmark_loading(args):
+    """Serial vs parallel load -> resample -> normalize -> features."""
+    categories = list(CLASS_RECIPES.keys())
+    data_loader = DataLoader()
+
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Generating {args.n_files} clips per class ({len(categories)} classes)...")
+        files = generate_corpus(root, categories, n_files=args.n_files, duration=args.duration)
+
+        # Warm up librosa/numba JIT so the serial run is not charged for it
+        y, sr = data_loader.load_wav_file(files[0][0])
+        data_loader.extract_features(y, sr)
+
+        results = {}
+        for n_jobs in [1, args.n_jobs]:
+            start = time.perf_counter()
+            X, _ = data_loader.prepare_data(root, categories, n_files=args.n_files, n_jobs=n_jobs, chunksize=args.chunksize)
+            elapsed = time.perf_counter() - start
+            results[n_jobs] = len(X) / elapsed
+
+    print("\n--- Loading + feature extraction ---")
+    for n_jobs, rate in results.items():
+        print(f"n_jobs={n_jobs:>3}: {rate:8.1f} clips/sec")
+
+def legacy_read_resampled(path):
+    """The decode + resample step before single-pass resampling: load at 44.1 kHz, then resample to 16 kHz."""
+    y, sr = librosa.load(path, sr=44100, duration=30)
+    return librosa.resample(y=y, orig_sr=sr, target_sr=16000)
+
+def measure_loader(load, paths):
+    """Returns clips/sec and peak traced memory in MB for loading every path."""
+    load(paths[0])  # warm up
+    tracemalloc.start()
+    start = time.perf_counter()
+    for path in paths:
+        load(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(paths) / elapsed, peak / 1e6
+
+def benchmark_resampling(args):
+    """Legacy double resample vs single soxr pass at each quality, on long 48 kHz files."""
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Generating {args.n_files} clips of {args.duration}s at 48 kHz...")
+        files = generate_corpus(root, ['music'], n_files=args.n_files, duration=args.duration, sr=48000)
+        paths = [path for path, _ in files]
+
+        results = {'legacy (librosa 44.1k -> 16k)': measure_loader(legacy_read_resampled, paths)}
+        for quality in ['QQ', 'LQ', 'MQ', 'HQ', 'VHQ']:
+            data_loader = DataLoader(resample_quality=quality)
+            results[f"soundfile + soxr {quality}"] = measure_loader(data_loader.read_resampled, paths)
+
+    print("\n--- decode + resample (first 30 s) ---")
+    for name, (rate, peak) in results.items():
+        print(f"{name:<30} {rate:8.1f} clips/sec   peak {peak:7.1f} MB")
+
+def legacy_extract_features(y, sr, n_mfcc=128, n_mels=128):
+    """Feature extraction before the shared STFT: two separate librosa passes."""
+    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
+    mel_db = librosa.power_to_db(librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels), ref=np.max)
+    return np.concatenate([np.mean(mfccs, axis=1), np.std(mfccs, axis=1), np.mean(mel_db, axis=1), np.std(mel_db, axis=1)])
+
+def benchmark_features(args):
+    """Two librosa passes vs the single-pass FeatureEngine on 16 kHz clips."""
+    rng = np.random.default_rng(0)
+    clips = [rng.standard_normal(int(args.duration * 16000)).astype(np.float32) for _ in range(args.n_files)]
+    data_loader = DataLoader()
+
+    results = {}
+    for name, extract in [('legacy (mfcc + melspectrogram)', legacy_extract_features),
+                          ('FeatureEngine (shared STFT)', data_loader.extract_features)]:
+        extract(clips[0], 16000)  # warm up
+        start = time.perf_counter()
+        features = [extract(clip, 16000) for clip in clips]
+        results[name] = (len(clips) / (time.perf_counter() - start), features)
+
+    max_diff = max(np.max(np.abs(a - b)) for a, b in zip(*(r[1] for r in results.values())))
+
+    print(f"\n--- extract_features ({args.duration}s clips) ---")
+    for name, (rate, _) in results.items():
+        print(f"{name:<32} {rate:8.1f} clips/sec")
+    print(f"Max absolute difference: {max_diff:.2e}")
+
+def benchmark_gridsearch(args):
+    """Grid search over SVM hyperparameters with and without pipeline caching."""
+    X, y = make_classification(n_samples=args.n_samples, n_features=512, n_informative=64, n_classes=5, random_state=0)
+    param_grid = {'model__C': [0.1, 1, 10, 100], 'model__gamma': ['scale', 0.001, 0.01]}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, memory in [('no cache', None), ('cold cache', cache_dir), ('warm cache', cache_dir)]:
+            classifier = AudioClassifier(model_type='svm', scaler_type='robust', memory=memory)
+            start = time.perf_counter()
+            search = classifier.grid_search(X, y, param_grid, n_folds=5)
+            results[name] = (time.perf_counter() - start, search.best_score_)
+
+    print(f"\n--- Grid search ({len(param_grid['model__C']) * len(param_grid['model__gamma'])} settings x 5 folds, robust scaler + SVM) ---")
+    for name, (elapsed, best) in results.items():
+        print(f"{name:<12} {elapsed:7.2f}s   best accuracy {best:.4f}")
+
+def benchmark_prediction(args):
+    """Per-row predict vs predict_batch: latency and throughput for the random forest."""
+    X, y = make_classification(n_samples=args.n_samples, n_features=512, n_informative=64, n_classes=5, random_state=0)
+    classifier = AudioClassifier(model_type='random_forest', scaler_type='standard')
+    classifier.fit(X, y)
+
+    start = time.perf_counter()
+    latencies = []
+    for row in X:
+        row_start = time.perf_counter()
+        classifier.predict(row)
+        latencies.append(time.perf_counter() - row_start)
+    single_rate = len(X) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    classifier.predict_batch(X)
+    batch_rate = len(X) / (time.perf_counter() - start)
+
+    print(f"\n--- Prediction ({len(X)} rows, random forest) ---")
+    print(f"predict        p50 {np.percentile(latencies, 50) * 1e3:7.2f} ms   p99 {np.percentile(latencies, 99) * 1e3:7.2f} ms   {single_rate:9.1f} rows/sec")
+    print(f"predict_batch  {batch_rate:9.1f} rows/sec")
+
+def benchmark_streaming(args):
+    """StreamingClassifier on a synthetic stream: per-push latency and real-time factor."""
+    categories = list(CLASS_RECIPES.keys())
+    data_loader = DataLoader()
+    sr = data_loader.target_sr
+    rng = np.random.default_rng(0)
+
+    print(f"Training on {args.n_files} synthetic clips per class...")
+    X = np.array([data_loader.extract_features(synthesize_clip(c, args.duration, sr, rng), sr)
+                  for c in categories for _ in range(args.n_files)])
+    y = np.repeat(categories, args.n_files)
+    classifier = AudioClassifier(model_type='random_forest', scaler_type='standard')
+    classifier.fit(X, y)
+
+    # One minute of audio switching class every 10 s, pushed in 250 ms chunks
+    stream = np.concatenate([synthesize_clip(categories[i % len(categories)], 10.0, sr, rng) for i in range(6)])
+    chunk = sr // 4
+    streaming = StreamingClassifier(classifier, data_loader, window_seconds=args.duration, hop_seconds=args.duration / 2)
+
+    latencies = []
+    n_labels = 0
+    start = time.perf_counter()
+    for offset in range(0, len(stream), chunk):
+        push_start = time.perf_counter()
+        n_labels += len(streaming.push(stream[offset : offset + chunk]))
+        latencies.append(time.perf_counter() - push_start)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n--- Streaming ({len(stream) / sr:.0f}s stream, {args.duration}s windows, 250 ms chunks) ---")
+    print(f"Push latency   p50 {np.percentile(latencies, 50) * 1e3:7.2f} ms   p99 {np.percentile(latencies, 99) * 1e3:7.2f} ms")
+    print(f"{n_labels} labels, {len(stream) / sr / elapsed:.1f}x real time")
+
+def benchmark_segments(args):
+    """Long-recording windows: one shared spectrogram vs a separate extract_features per window."""
+    categories = list(CLASS_RECIPES.keys())
+    data_loader = DataLoader()
+    sr = data_loader.target_sr
+    rng = np.random.default_rng(0)
+
+    X = np.array([data_loader.extract_features(synthesize_clip(c, 5.0, sr, rng), sr) for c in categories for _ in range(10)])
+    classifier = AudioClassifier(model_type='random_forest', scaler_type='standard')
+    classifier.fit(X, np.repeat(categories, 10))
+    segmenter = SegmentClassifier(classifier, data_loader, window_seconds=5.0, hop_seconds=1.0)
+
+    def per_window(path):
+        y, _ = librosa.load(path, sr=sr)
+        window, hop = 5 * sr, sr
+        features = [data_loader.extract_features(librosa.util.normalize(y[i : i + window]), sr)
+                    for i in range(0, len(y) - window + 1, hop)]
+        return classifier.predict_batch(np.array(features))
+
+    with tempfile.TemporaryDirectory() as root:
+        # Long 44.1 kHz recording switching class every 30 s
+        path = os.path.join(root, 'long.wav')
+        n_parts = max(1, int(args.minutes * 2))
+        with sf.SoundFile(path, 'w', samplerate=44100, channels=1) as f:
+            for i in range(n_parts):
+                f.write(synthesize_clip(categories[i % len(categories)], 30.0, 44100, rng))
+
+        results = {}
+        for name, run in [('per-window extract_features', per_window), ('SegmentClassifier', segmenter.classify_file)]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            run(path)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = (elapsed, peak / 1e6)
+
+        segments, change_points = segmenter.timeline(segmenter.classify_file(path))
+
+    print(f"\n--- {n_parts * 0.5:.1f} min recording, 5 s windows, 1 s hop ---")
+    for name, (elapsed, peak) in results.items():
+        print(f"{name:<28} {elapsed:7.2f}s   {n_parts * 30 / elapsed:7.1f}x real time   peak {peak:7.1f} MB")
+    print(f"{len(segments)} segments, change-points at {[round(t, 1) for t in change_points]}")
+
+def benchmark_serialization(args):
+    """
+    Model artifact size, load time and first-prediction latency per
+    compression / mmap setting. joblib's mmap_mode cannot map a scikit-learn
+    forest (its trees copy their node tables when unpickled); the exported
+    node tables can be.
+    """
+    X, y = make_classification(n_samples=args.n_samples, n_features=512, n_informative=64, n_classes=5, random_state=0)
+    classifier = AudioClassifier(model_type='random_forest', scaler_type='robust')
+    classifier.fit(X, y)
+
+    settings = [('uncompressed', 0, None), ('uncompressed + mmap', 0, 'r'),
+                ('zlib 3', 3, None), ('zlib 9', 9, None), ('lz4 3', ('lz4', 3), None)]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        for i, (name, compress, mmap_mode) in enumerate(settings):
+            path = os.path.join(root, f"model_{i}.pkl")
+            try:
+                classifier.save_model(path, compress=compress)
+            except ValueError as e:
+                print(f"Skipping {name}: {e}")
+                continue
+
+            loaded = AudioClassifier()
+            start = time.perf_counter()
+            loaded.load_model(path, mmap_mode=mmap_mode)
+            load_time = time.perf_counter() - start
+            loaded.predict(X[0])
+            first_prediction = time.perf_counter() - start
+            results[name] = (os.path.getsize(path) / 1e6, load_time, first_prediction)
+
+        # Exported node tables, read vs memory-mapped by the numpy-only ForestModel
+        export_dir = os.path.join(root, 'forest')
+        classifier.export_forest(export_dir)
+        size = sum(os.path.getsize(os.path.join(export_dir, name)) for name in os.listdir(export_dir)) / 1e6
+        for name, mmap_mode in [('exported forest', None), ('exported forest + mmap', 'r')]:
+            start = time.perf_counter()
+            forest = ForestModel(export_dir, mmap_mode=mmap_mode)
+            load_time = time.perf_counter() - start
+            forest.predict(X[:1])
+            results[name] = (size, load_time, time.perf_counter() - start)
+
+    print(f"\n--- Model artifact (random forest, {args.n_samples} rows x 512 features) ---")
+    for name, (size, load_time, first_prediction) in results.items():
+        print(f"{name:<22} {size:7.2f} MB   load {load_time * 1e3:8.1f} ms   load + first prediction {first_prediction * 1e3:8.1f} ms")
+
+def timed_run(code):
+    """Wall time of a fresh interpreter running code, and its stdout."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - start, result.stdout
+
+def benchmark_startup(args):
+    """
+    Cold start of a one-file prediction: pickled sklearn model vs inference.py
+    with the exported forest. Fails (exit code 1) if inference.py exceeds
+    --budget seconds or imports a heavy module.
+    """
+    categories = list(CLASS_RECIPES.keys())
+    data_loader = DataLoader()
+
+    with tempfile.TemporaryDirectory() as root:
+        files = generate_corpus(root, categories, n_files=args.n_files, duration=args.duration)
+        X, y = data_loader.prepare_data(root, categories, n_files=args.n_files)
+        classifier = AudioClassifier(model_type='random_forest', scaler_type='robust')
+        classifier.fit(X, y)
+
+        model_path = os.path.join(root, 'model.pkl')
+        forest_path = os.path.join(root, 'model.npz')
+        classifier.save_model(model_path)
+        classifier.export_forest(forest_path, data_loader.extraction_params())
+        wav = str(files[0][0])
+
+        heavy = ['librosa', 'numba', 'sklearn', 'matplotlib', 'dotenv']
+        runs = {
+            'sklearn model (classifier + data_loader)': (
+                "from classifier import AudioClassifier; from data_loader import DataLoader; import librosa\n"
+                f"c = AudioClassifier(); c.load_model({model_path!r}); d = DataLoader()\n"
+                f"y, sr = d.load_wav_file({wav!r}); print(c.predict(d.extract_features(y, sr)))"),
+            'inference.py (exported forest)': (
+                f"import sys, inference; inference.main([{forest_path!r}, {wav!r}])\n"
+                f"print([m for m in {heavy!r} if m in sys.modules])"),
+        }
+
+        # One untimed run each so both start from a warm OS file cache
+        results = {}
+        for name, code in runs.items():
+            timed_run(code)
+            times = [timed_run(code) for _ in range(3)]
+            results[name] = (min(t for t, _ in times), times[0][1].strip().splitlines()[-1])
+
+    print("\n--- Cold start: load model + classify one file (best of 3) ---")
+    for name, (elapsed, last_line) in results.items():
+        print(f"{name:<42} {elapsed:6.2f}s")
+
+    elapsed, imported = results['inference.py (exported forest)']
+    ok = elapsed <= args.budget and imported == '[]'
+    print(f"inference.py: {elapsed:.2f}s (budget {args.budget:.2f}s), heavy modules imported: {imported} -> {'PASS' if ok else 'FAIL'}")
+    if not ok:
+        sys.exit(1)
+
+def benchmark_batch(args):
+    """Per-clip extract_features vs padded, length-bucketed batches on clips of 1-30 s."""
+    rng = np.random.default_rng(0)
+    data = [(rng.standard_normal(int(rng.uniform(1, 30) * 16000)).astype(np.float32), 16000, None)
+            for _ in range(args.n_files)]
+    data_loader = DataLoader()
+    data_loader.extract_features_batch(data[:2])  # warm up
+
+    start = time.perf_counter()
+    per_clip = [data_loader.extract_features(y, sr) for y, sr, _ in data]
+    per_clip_rate = len(data) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batched = data_loader.extract_features_batch(data)
+    batched_rate = len(data) / (time.perf_counter() - start)
+
+    max_diff = max(np.max(np.abs(a - b)) for a, b in zip(per_clip, batched))
+    print(f"\n--- extract_features on {len(data)} clips of 1-30 s ---")
+    print(f"{'per clip':<10} {per_clip_rate:8.1f} clips/sec")
+    print(f"{'batched':<10} {batched_rate:8.1f} clips/sec")
+    print(f"Max absolute difference: {max_diff:.2e}")
+
+def benchmark_trimming(args):
+    """Compute saved by silence trimming on clips with leading/trailing near-silence."""
+    categories = list(CLASS_RECIPES.keys())
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as root:
+        for category in categories:
+            os.makedirs(os.path.join(root, category, 'wavs'))
+            for i in range(args.n_files):
+                lead, tail = rng.uniform(0, 2 * args.duration, size=2)
+                clip = np.concatenate([
+                    1e-4 * rng.standard_normal(int(lead * 16000)),
+                    synthesize_clip(category, args.duration, 16000, rng),
+                    1e-4 * rng.standard_normal(int(tail * 16000)),
+                ]).astype(np.float32)
+                sf.write(os.path.join(root, category, 'wavs', f"{category}{i}.wav"), clip, 16000)
+
+        trimmed_loader = DataLoader(trim_db=20)
+        trimmed_loader.trim_report(root, categories, n_files=args.n_files)
+
+        results = {}
+        for name, data_loader in [('untrimmed', DataLoader(trim_db=None)), ('trimmed (20 dB)', trimmed_loader)]:
+            data = data_loader.load_wavs(root, categories, n_files=args.n_files)
+            data_loader.extract_features_batch(data[:2])  # warm up
+            start = time.perf_counter()
+            data_loader.extract_features_from_data(data)
+            results[name] = (time.perf_counter() - start, sum(len(y) for y, _, _ in data) / 16000)
+
+        # Padding a clip with silence must not change its trimmed features. The
+        # clip has quiet edges of its own, so the trim lands inside it in both
+        # files; the leading pad is a whole number of hops so frames line up
+        hop = trimmed_loader.feature_engine.hop_length
+        quiet = lambda n: 3e-3 * synthesize_clip(categories[0], n / 16000, 16000, rng)
+        clip = np.concatenate([quiet(4000), synthesize_clip(categories[0], args.duration, 16000, rng), quiet(4000)]).astype(np.float32)
+        padded = np.concatenate([np.zeros(16 * hop, np.float32), clip, np.zeros(5000, np.float32)])
+        trimmed = {}
+        for name, samples in [('clip', clip), ('padded', padded)]:
+            path = os.path.join(root, f"{name}.wav")
+            sf.write(path, samples, 16000, subtype='FLOAT')
+            trimmed[name], _ = trimmed_loader.load_wav_file(path)
+        frames = {name: trimmed_loader.feature_engine.power_spectrogram(y).shape[1] for name, y in trimmed.items()}
+        padded_frames = 1 + len(padded) // hop
+        assert frames['padded'] == frames['clip'] < padded_frames, frames
+        assert np.array_equal(trimmed_loader.extract_features(trimmed['padded'], 16000), trimmed_loader.extract_features(trimmed['clip'], 16000))
+
+    print(f"\n--- Feature extraction with and without trimming ({args.n_files} clips per class) ---")
+    for name, (elapsed, seconds) in results.items():
+        print(f"{name:<16} {seconds:8.1f}s of audio   {elapsed:6.2f}s to extract")
+    print(f"Silence-padded clip: {padded_frames} STFT frames untrimmed, {frames['padded']} trimmed "
+          f"(unpadded clip trimmed: {frames['clip']}); trimmed features identical")
+
+def benchmark_dataset(args):
+    """Peak memory of load_wavs + extract_features_from_data vs streaming into a memory-mapped matrix."""
+    categories = list(CLASS_RECIPES.keys())
+    data_loader = DataLoader()
+
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Generating {args.n_files} clips of {args.duration}s per class...")
+        generate_corpus(root, categories, n_files=args.n_files, duration=args.duration, sr=16000)
+        files = data_loader.list_wavs(root, categories, n_files=args.n_files)
+        data_loader.extract_features_batch([(*data_loader.load_wav_file(files[0][0]), None)], verbose=False)  # warm up
+
+        def in_memory():
+            data = data_loader.load_wavs(root, categories, n_files=args.n_files)
+            return np.array(data_loader.extract_features_from_data(data)[0])
+
+        def streamed():
+            return data_loader.extract_to_matrix(files, out_path=os.path.join(root, 'features.npy'))[0]
+
+        results = {}
+        for name, run in [('load_wavs + extract', in_memory), ('extract_to_matrix (mmap)', streamed)]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            X = run()
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = (len(X) / elapsed, peak / 1e6)
+            del X
+
+    print(f"\n--- {len(files)} clips of {args.duration}s ---")
+    for name, (rate, peak) in results.items():
+        print(f"{name:<26} {rate:8.1f} clips/sec   peak {peak:8.1f} MB")
+
+def benchmark_incremental(args):
+    """Nightly updates: partial_fit vs full retraining, update time and held-out accuracy."""
+    X, y = make_classification(n_samples=args.n_samples * 2, n_features=512, n_informative=64, n_classes=5,
+                               random_state=0)
+    X_test, y_test = X[args.n_samples:], y[args.n_samples:]
+    X, y = X[:args.n_samples], y[:args.n_samples]
+
+    # Initial training set, then equal nightly batches
+    n_batches = 5
+    initial = args.n_samples // 2
+    batches = np.array_split(np.arange(initial, args.n_samples), n_batches)
+
+    results = {}
+    for model_type in ['random_forest', 'sgd']:
+        incremental = AudioClassifier(model_type=model_type, scaler_type='standard')
+        incremental.partial_fit(X[:initial], y[:initial])
+
+        rows = []
+        for night, batch in enumerate(batches, 1):
+            start = time.perf_counter()
+            incremental.partial_fit(X[batch], y[batch])
+            update_time = time.perf_counter() - start
+
+            seen = batch[-1] + 1
+            full = AudioClassifier(model_type=model_type, scaler_type='standard')
+            start = time.perf_counter()
+            full.fit(X[:seen], y[:seen])
+            full_time = time.perf_counter() - start
+
+            rows.append((night, seen, update_time, incremental.score(X_test, y_test), full_time, full.score(X_test, y_test)))
+        results[model_type] = rows
+
+    print(f"\n--- Incremental training ({initial} initial rows + {n_batches} nightly batches, 512 features) ---")
+    for model_type, rows in results.items():
+        print(f"{model_type}:")
+        print(f"  {'night':>5} {'rows':>6}  {'update':>9} {'acc':>6}  {'retrain':>9} {'acc':>6}")
+        for night, seen, update_time, update_acc, full_time, full_acc in rows:
+            print(f"  {night:>5} {seen:>6}  {update_time:8.3f}s {update_acc:6.3f}  {full_time:8.3f}s {full_acc:6.3f}")
+
+def benchmark_svm_scaling(args):
+    """
+    Training time and held-out accuracy vs training-set size for the exact
+    RBF SVM and its Nystroem / random Fourier feature approximations, at
+    training-set sizes spaced geometrically up to --n-samples.
+    The exact SVM is skipped past 10k samples, where it takes minutes to hours.
+    """
+    # Half-decade steps down from --n-samples, at most five of them and none below 100 rows
+    sizes = sorted({int(round(args.n_samples / 10 ** (k / 2))) for k in range(5)} - set(range(100)))
+    if not sizes:
+        raise ValueError("svm_scaling needs --n-samples >= 100")
+    X, y = make_classification(n_samples=max(sizes) + 2000, n_features=512, n_informative=64, n_classes=5, random_state=0)
+    X_test, y_test = X[-2000:], y[-2000:]
+
+    curves = {}
+    for model_type in ['svm', 'nystroem_svm', 'rff_svm']:
+        for n in sizes:
+            if model_type == 'svm' and n > 10000:
+                continue
+            classifier = AudioClassifier(model_type=model_type, scaler_type='standard')
+            start = time.perf_counter()
+            classifier.fit(X[:n], y[:n])
+            fit_time = time.perf_counter() - start
+            curves.setdefault(model_type, []).append((n, fit_time, classifier.score(X_test, y_test)))
+            print(f"{model_type:<13} n={n:>6}  fit {fit_time:8.2f}s  accuracy {curves[model_type][-1][2]:.4f}")
+
+    if args.output:
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(12, 5))
+        time_ax, accuracy_ax = fig.subplots(1, 2)
+        for model_type, points in curves.items():
+            n, fit_time, accuracy = zip(*points)
+            time_ax.loglog(n, fit_time, marker='o', label=model_type)
+            accuracy_ax.semilogx(n, accuracy, marker='o', label=model_type)
+        time_ax.set_xlabel('Training samples')
+        time_ax.set_ylabel('Fit time (s)')
+        accuracy_ax.set_xlabel('Training samples')
+        accuracy_ax.set_ylabel('Held-out accuracy')
+        time_ax.legend()
+        fig.tight_layout()
+        fig.savefig(args.output)
+        print(f"Plot saved to {args.output}")
+
+def benchmark_selection(args):
+    """Accuracy, fit time and per-clip extraction / prediction latency with and without feature selection."""
+    categories = list(CLASS_RECIPES.keys())
+    data_loader = DataLoader()
+    engine = data_loader.feature_engine
+    sr = data_loader.target_sr
+    rng = np.random.default_rng(0)
+
+    clips = [synthesize_clip(c, args.duration, sr, rng) for c in categories for _ in range(args.n_files)]
+    X = np.array([data_loader.extract_features(clip, sr) for clip in clips])
+    y = np.repeat(categories, args.n_files)
+    train = rng.permutation(len(y)) < len(y) * 0.8
+
+    results = {}
+    for n_selected in [None, 128, 64, 32, 16]:
+        for method in (['importance', 'mutual_info'] if n_selected else [None]):
+            classifier = AudioClassifier(model_type='random_forest', scaler_type='standard',
+                                         n_selected_features=n_selected, selection_method=method or 'importance')
+            classifier.fit(X[train], y[train])
+            accuracy = classifier.score(X[~train], y[~train])
+
+            indices = classifier.selected_features
+            extract_times, predict_times = [], []
+            for clip in clips[:50]:
+                start = time.perf_counter()
+                if indices is None:
+                    features = data_loader.extract_features(clip, sr)
+                else:
+                    features = engine.selected_features(clip, sr, indices)
+                extract_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                classifier.predict_batch(features[None, :], selected=indices is not None)
+                predict_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            classifier.fit(X[train], y[train])
+            fit_time = time.perf_counter() - start
+
+            name = 'all 512 features' if n_selected is None else f"{n_selected} by {method}"
+            results[name] = (accuracy, fit_time, np.percentile(extract_times, 50), np.percentile(predict_times, 50))
+
+    # Mel-only selections skip the MFCC branch; the dB reference still needs every band
+    mel_only = {}
+    for n_mels in [128, 64]:
+        indices = 2 * 128 + np.sort(rng.choice(2 * n_mels, 32, replace=False))
+        timings = {'full': [], 'selected': []}
+        for clip in clips[:50]:
+            start = time.perf_counter()
+            full = data_loader.extract_features(clip, sr, n_mels=n_mels)
+            timings['full'].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            features = engine.selected_features(clip, sr, indices, n_mels=n_mels)
+            timings['selected'].append(time.perf_counter() - start)
+            assert np.allclose(features, full[indices], rtol=1e-4, atol=1e-3)
+        mel_only[n_mels] = {name: np.percentile(times, 50) for name, times in timings.items()}
+
+    print(f"\n--- Feature selection ({len(y)} clips of {args.duration}s, random forest) ---")
+    for name, (accuracy, fit_time, extract, predict) in results.items():
+        print(f"{name:<20} accuracy {accuracy:.4f}   fit {fit_time:6.2f}s   "
+              f"extract p50 {extract * 1e3:6.2f} ms   predict p50 {predict * 1e3:6.2f} ms")
+    for n_mels, times in mel_only.items():
+        print(f"32 Mel features of {n_mels} bands: extract p50 {times['selected'] * 1e3:6.2f} ms "
+              f"(all features {times['full'] * 1e3:6.2f} ms)")
+
+def augmented_training_rows(augmenter, X, y, groups, train):
+    """Training rows of an augmented matrix plus their mixup rows, mixed after the split."""
+    X_mix, y_mix, _ = augmenter.mixup(X[train], y[train], groups[train])
+    return np.vstack([X[train], X_mix]), np.concatenate([y[train], y_mix])
+
+def benchmark_augmentation(args):
+    """
+    Rows/sec of spectral augmentation vs extracting a decoded clip again, and
+    held-out accuracy of a small training set with and without augmentation.
+    """
+    categories = list(CLASS_RECIPES.keys())
+    data_loader = DataLoader()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, categories, n_files=args.n_files, duration=args.duration)
+        files = data_loader.list_wavs(root, categories, n_files=args.n_files)
+
+        start = time.perf_counter()
+        X_plain, y_plain = data_loader.extract_to_matrix(files)
+        plain_rate = len(files) / (time.perf_counter() - start)
+
+        augmenter = SpectralAugmenter(n_augment=10, n_mixup=5)
+        start = time.perf_counter()
+        X, y, groups = data_loader.extract_augmented(files, augmenter)
+        augmented_rate = len(X) / (time.perf_counter() - start)
+
+    # Train on 40% of the clips (and their augmentations), test on the other clips' own rows
+    train_clips = np.random.default_rng(0).permutation(len(files)) < 0.4 * len(files)
+    results = {}
+    for name, X_train, y_train in [
+            ('clips only', X_plain[train_clips], y_plain[train_clips]),
+            ('augmented', *augmented_training_rows(augmenter, X, y, groups, train_clips[groups]))]:
+        classifier = AudioClassifier(model_type='random_forest', scaler_type='robust')
+        classifier.fit(X_train, y_train)
+        results[name] = (len(X_train), classifier.score(X_plain[~train_clips], y_plain[~train_clips]))
+
+    print(f"\n--- Augmentation ({len(files)} clips of {args.duration}s) ---")
+    print(f"Decode + extract:        {plain_rate:8.1f} rows/sec")
+    print(f"Decode once + augment:   {augmented_rate:8.1f} rows/sec ({len(X)} rows)")
+    for name, (n_rows, accuracy) in results.items():
+        print(f"{name:<12} {n_rows:6d} training rows   held-out accuracy {accuracy:.4f}")
+
+def median_rate(func, n_items, repeats):
+    """Items/sec of func over n_items, median of repeats runs after one warm-up run."""
+    func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return n_items / float(np.median(times))
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(report, prefix=''):
+    """Numeric leaves of a nested report as {'a.b.c': value}."""
+    values = {}
+    for key, value in report.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[f"{prefix}{key}"] = value
+    return values
+
+def benchmark_report(args):
+    """
+    Fixed, seeded benchmark suite written to a JSON report (--json) that can
+    be compared across commits (--baseline): load_wav_file and
+    extract_features clips/sec, then training time and single-clip
+    prediction latency (p50/p99) for random_forest and svm. The corpus is
+    generated from --seed, so two runs with the same options measure the
+    same audio.
+    """
+    # The split below holds out at least one clip of every class
+    if args.n_files < 2:
+        raise ValueError("report needs --n-files >= 2 to hold out a clip of every class")
+
+    import sklearn
+
+    categories = list(CLASS_RECIPES.keys())
+    data_loader = DataLoader()
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {'n_files': args.n_files, 'n_classes': len(categories), 'duration': args.duration,
+                   'seed': args.seed, 'repeats': args.repeats},
+    }
+
+    with tempfile.TemporaryDirectory() as root:
+        files = generate_corpus(root, categories, n_files=args.n_files, duration=args.duration, seed=args.seed)
+        paths = [path for path, _ in files]
+        clips = [data_loader.load_wav_file(path) for path in paths]
+
+        report['load_wav_file'] = {'clips_per_sec': median_rate(lambda: [data_loader.load_wav_file(path) for path in paths], len(paths), args.repeats)}
+        report['extract_features'] = {
+            'clips_per_sec': median_rate(lambda: [data_loader.extract_features(y, sr) for y, sr in clips], len(clips), args.repeats),
+            'batch_clips_per_sec': median_rate(
+                lambda: data_loader.extract_features_batch([(y, sr, None) for y, sr in clips], verbose=False), len(clips), args.repeats),
+        }
+
+    X = np.array([data_loader.extract_features(y, sr) for y, sr in clips])
+    labels = np.array([category for _, category in files])
+    # Stratified like AudioClassifier.train, so every class is in both splits
+    test_size = max(len(categories), int(round(0.2 * len(labels))))
+    train_rows, _ = train_test_split(np.arange(len(labels)), test_size=test_size, random_state=args.seed, stratify=labels)
+    train = np.isin(np.arange(len(labels)), train_rows)
+
+    for model_type in ['random_forest', 'svm']:
+        fit_times = []
+        for _ in range(args.repeats):
+            classifier = AudioClassifier(model_type=model_type, scaler_type='standard')
+            start = time.perf_counter()
+            classifier.fit(X[train], labels[train])
+            fit_times.append(time.perf_counter() - start)
+
+        latencies = []
+        for row in X[~train]:
+            start = time.perf_counter()
+            classifier.predict(row)
+            latencies.append(time.perf_counter() - start)
+
+        report[model_type] = {
+            'fit_seconds': float(np.median(fit_times)),
+            'predict_p50_ms': float(np.percentile(latencies, 50) * 1e3),
+            'predict_p99_ms': float(np.percentile(latencies, 99) * 1e3),
+            'batch_rows_per_sec': median_rate(lambda: classifier.predict_batch(X[~train]), int((~train).sum()), args.repeats),
+            'accuracy': float(classifier.score(X[~train], labels[~train])),
+        }
+
+    with open(args.json, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline_report = json.load(f)
+        if baseline_report.get('config') != report['config']:
+            print(f"Warning: {args.baseline} was run with {baseline_report.get('config')}, numbers are not comparable")
+        baseline = flatten(baseline_report)
+
+    print(f"\n--- Benchmark report ({len(files)} clips of {args.duration}s, commit {report['commit']}) ---")
+    for key, value in flatten(report).items():
+        if key.startswith(('config.', 'environment.')):
+            continue
+        line = f"{key:<36} {value:12.3f}"
+        if baseline and baseline.get(key):
+            line += f"   ({(value - baseline[key]) / baseline[key]:+.1%} vs baseline)"
+        print(line)
+    print(f"Report written to {args.json}")
+
+BENCHMARKS = {
+    'loading': benchmark_loading,
+    'resampling': benchmark_resampling,
+    'features': benchmark_features,
+    'batch': benchmark_batch,
+    'augmentation': benchmark_augmentation,
+    'trimming': benchmark_trimming,
+    'dataset': benchmark_dataset,
+    'gridsearch': benchmark_gridsearch,
+    'incremental': benchmark_incremental,
+    'svm_scaling': benchmark_svm_scaling,
+    'selection': benchmark_selection,
+    'prediction': benchmark_prediction,
+    'streaming': benchmark_streaming,
+    'segments': benchmark_segments,
+    'serialization': benchmark_serialization,
+    'startup': benchmark_startup,
+    'report': benchmark_report,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the hw2b pipeline.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS.keys()))
+    parser.add_argument("--n-files", type=int, default=600, help="Clips per class")
+    parser.add_argument("--duration", type=float, default=1.0, help="Clip length in seconds")
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count(), help="Workers for the parallel run")
+    parser.add_argument("--chunksize", type=int, default=16)
+    parser.add_argument("--n-samples", type=int, default=2000, help="Rows of synthetic feature data")
+    parser.add_argument("--budget", type=float, default=1.0, help="Startup-time budget in seconds (startup)")
+    parser.add_argument("--output", help="Plot file for benchmarks that draw curves (svm_scaling)")
+    parser.add_argument("--minutes", type=float, default=10.0, help="Length of the long recording (segments)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpus (report)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per measurement, the median is reported (report)")
+    parser.add_argument("--json", default="benchmark_report.json", help="Where the report is written (report)")
+    parser.add_argument("--baseline", help="Earlier report to compare against (report)")
+
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
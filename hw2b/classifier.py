@@ -1,19 +1,41 @@
 import numpy as np
-from sklearn.model_selection import KFold, cross_validate, train_test_split
+from sklearn.model_selection import GridSearchCV, GroupKFold, KFold, StratifiedGroupKFold, cross_validate, train_test_split
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import MinMaxScaler, RobustScaler, StandardScaler, LabelEncoder
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.svm import SVC
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import SGDClassifier
+from sklearn.svm import SVC, LinearSVC
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from sklearn.model_selection import cross_val_score
+import json
+import os
 import joblib
+import sklearn
+from feature_selection import FeatureSelector
+from profiling import profiler
+
+# Bumped whenever the layout of the saved model_data dictionary changes
+MODEL_FORMAT_VERSION = 1
 
 class AudioClassifier:
-    def __init__(self, model_type='random_forest', scaler_type='standard'):
+    def __init__(self, model_type='random_forest', scaler_type='standard', memory=None, n_selected_features=None, selection_method='importance'):
         """
         Initialize the audio classifier.
 
         Args:
-            model_type: 'random_forest' or 'svm'
+            model_type: 'random_forest', 'svm', 'sgd' (linear model trained
+                by stochastic gradient descent, supports partial_fit), or
+                'nystroem_svm' / 'rff_svm': an RBF SVM approximated by a
+                Nystroem or random Fourier feature map and a linear SVM, which
+                trains in roughly linear time in the number of samples
+            scaler_type: 'standard', 'minmax' or 'robust'
+            memory: Optional joblib cache directory (or joblib.Memory) for the
+                pipeline, so scaler fits on identical data are reused across
+                cross-validation and grid searches
+            n_selected_features: If set, a FeatureSelector keeps only this many
+                columns of the full extract_features vector (see selected_features)
+            selection_method: 'importance' or 'mutual_info'
         """
 
         self.label_encoder = LabelEncoder()
@@ -33,10 +55,32 @@ class AudioClassifier:
             self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         elif model_type == 'svm':
             self.model = SVC(kernel='rbf', random_state=42)
+        elif model_type == 'sgd':
+            # log_loss gives predict_proba, like the forest
+            self.model = SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42)
+        elif model_type == 'nystroem_svm':
+            # gamma=None is 1 / n_features, i.e. SVC's gamma='scale' on standardized features
+            self.model = Pipeline([
+                ('feature_map', Nystroem(kernel='rbf', gamma=None, n_components=500, random_state=42)),
+                ('svm', LinearSVC(dual='auto', random_state=42))])
+        elif model_type == 'rff_svm':
+            # Random Fourier features converge more slowly than Nystroem, so they get more components
+            self.model = Pipeline([
+                ('feature_map', RBFSampler(gamma='scale', n_components=1000, random_state=42)),
+                ('svm', LinearSVC(dual='auto', random_state=42))])
         else:
-            raise ValueError("model_type must be 'random_forest' or 'svm'")
+            raise ValueError("model_type must be 'random_forest', 'svm', 'sgd', 'nystroem_svm' or 'rff_svm'")
+
+        # Scaling lives inside the pipeline so every fit (including each
+        # cross-validation fold) only ever sees its own training data
+        self.memory = memory
+        steps = [('scaler', self.scaler), ('model', self.model)]
+        if n_selected_features is not None:
+            # Selection is refit with everything else, so it never sees test folds either
+            steps.insert(0, ('select', FeatureSelector(n_features=n_selected_features, method=selection_method)))
+        self.pipeline = Pipeline(steps, memory=memory)
 
-    def train(self, X, y, test_size=0.2):
+    def train(self, X, y, test_size=0.2, groups=None, augmenter=None):
         """
         Train the classifier.
 
@@ -44,6 +88,12 @@ class AudioClassifier:
             X: Feature matrix
             y: Labels
             test_size: Proportion of data for testing
+            groups: Source clip of every row (DataLoader.prepare_data with
+                return_groups). The split is then made by clip, so augmented
+                copies of a clip never fall on both sides, and stratified by
+                class; test_size is rounded to 1 / n_splits.
+            augmenter: Optional SpectralAugmenter whose mixup rows are added
+                to the training split only
 
         Returns:
             Dictionary with training results
@@ -52,41 +102,170 @@ class AudioClassifier:
         y_encoded = self.label_encoder.fit_transform(y)
 
         # Split data
-        X_train, _, y_train, _ = train_test_split(
-            X, y_encoded, test_size=test_size, random_state=42, stratify=y_encoded
-        )
+        if groups is None:
+            X_train, _, y_train, _ = train_test_split(
+                X, y_encoded, test_size=test_size, random_state=42, stratify=y_encoded
+            )
+            groups_train = np.arange(len(X_train))
+        else:
+            # The first fold of a stratified group k-fold holds out about test_size of the clips, per class
+            cv = StratifiedGroupKFold(n_splits=round(1 / test_size), shuffle=True, random_state=42)
+            train_rows, _ = next(cv.split(X, y_encoded, groups))
+            X_train, y_train, groups_train = X[train_rows], y_encoded[train_rows], np.asarray(groups)[train_rows]
 
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
+        # Mixup after the split, so no held-out clip ends up inside a mixed row
+        if augmenter is not None and augmenter.n_mixup > 0:
+            X_mix, y_mix, _ = augmenter.mixup(X_train, y_train, groups_train)
+            X_train, y_train = np.vstack([X_train, X_mix]), np.concatenate([y_train, y_mix])
 
         # Train model
         print(f"\nTraining {self.model_type} classifier with {self.scaler_type} scaler...")
-        self.model.fit(X_train_scaled, y_train)
+        self._fit_encoded(X_train, y_train)
+
+    def fit(self, X, y):
+        """
+        Train the classifier on all of X, without holding out a test split.
+
+        Args:
+            X: Feature matrix
+            y: Labels
+        """
+        y_encoded = self.label_encoder.fit_transform(y)
+        self._fit_encoded(X, y_encoded)
+
+    def partial_fit(self, X, y, classes=None, n_new_trees=20):
+        """
+        Updates a trained classifier with a new batch of labeled clips
+        instead of refitting on everything seen so far.
+
+        - 'sgd': the scaler is updated with partial_fit (running mean and
+          variance / min and max) and the linear model takes one more pass
+          over the scaled batch.
+        - 'random_forest': n_new_trees trees are grown on the batch and added
+          to the forest (warm_start). The scaler stays frozen, since the
+          existing trees' thresholds are expressed in its units.
+
+        The first call on an untrained classifier is a regular fit.
+
+        Args:
+            X: Feature matrix of the new batch
+            y: Labels of the new batch
+            classes: All labels that will ever be seen. Needed for 'sgd' when
+                the first batch does not contain every class.
+            n_new_trees: Trees added per update ('random_forest')
+        """
+        if self.model_type not in ('sgd', 'random_forest'):
+            raise ValueError("partial_fit supports 'sgd' and 'random_forest' models")
+
+        first_call = not hasattr(self.label_encoder, 'classes_')
+        if first_call:
+            self.label_encoder.fit(classes if classes is not None else y)
+        unknown = set(np.unique(y)) - set(self.label_encoder.classes_)
+        if unknown:
+            raise ValueError(f"Labels {sorted(unknown)} were not known when the classifier was first trained")
+        y_encoded = self.label_encoder.transform(y)
+
+        if self.model_type == 'random_forest':
+            if first_call:
+                self._fit_encoded(X, y_encoded)
+                return
+            # New trees must produce probability columns for every class
+            if len(np.unique(y_encoded)) != len(self.model.classes_):
+                raise ValueError("Every random_forest update batch must contain all classes")
+            with profiler.timer('scale'):
+                X_scaled = self.scaler.transform(self._select(X, y_encoded))
+            # warm_start only for this update: a later fit/train must grow a fresh forest
+            params = self.model.get_params()
+            self.model.set_params(warm_start=True, n_estimators=len(self.model.estimators_) + n_new_trees)
+            try:
+                with profiler.timer('fit'):
+                    self.model.fit(X_scaled, y_encoded)
+            finally:
+                self.model.set_params(warm_start=params['warm_start'], n_estimators=params['n_estimators'])
+            return
+
+        if not hasattr(self.scaler, 'partial_fit'):
+            raise ValueError(f"The {self.scaler_type} scaler cannot be updated incrementally, use 'standard' or 'minmax'")
+        X = self._select(X, y_encoded)
+        with profiler.timer('scale'):
+            self.scaler.partial_fit(X)
+            X_scaled = self.scaler.transform(X)
+        with profiler.timer('fit'):
+            self.model.partial_fit(X_scaled, y_encoded, classes=np.arange(len(self.label_encoder.classes_)))
+
+    def _fit_encoded(self, X, y_encoded):
+        # Scaling is fitted inside the pipeline, so it is part of 'fit' here
+        with profiler.timer('fit'):
+            self.pipeline.fit(X, y_encoded)
+        self._sync_steps()
+
+    def _sync_steps(self):
+        # A cached pipeline fits a clone of the scaler, keep the attributes
+        # pointing at the fitted steps
+        self.scaler = self.pipeline.named_steps['scaler']
+        self.model = self.pipeline.named_steps['model']
 
     def predict(self, features):
         """
         Predict category for a single audio file.
 
         Args:
-            audio_path: Path to audio file
+            features: Feature vector of one audio file
 
         Returns:
             Predicted category and probability
         """
-        features_scaled = self.scaler.transform(features.reshape(1, -1))
-        prediction = self.model.predict(features_scaled)
-        category = self.label_encoder.inverse_transform(prediction)[0]
+        categories, confidences = self.predict_batch(features.reshape(1, -1))
+        return categories[0], confidences[0] if confidences is not None else None
 
-        # Get probability if available
+    def predict_batch(self, X, selected=False):
+        """
+        Predict categories for a batch of feature vectors with one scaling
+        pass and one model pass. When the model has probabilities, labels
+        are derived from them instead of running predict separately.
+
+        Args:
+            X: Feature matrix of shape (N, D)
+            selected: X only holds the selected_features columns (e.g. from
+                FeatureEngine.selected_features), so the selection step is skipped
+
+        Returns:
+            Array of N categories and array of N confidences (None if the
+            model has no predict_proba)
+        """
+        # Selection and scaling, then the model alone, so both can be timed
+        preprocess = self.pipeline[1:-1] if selected and 'select' in self.pipeline.named_steps else self.pipeline[:-1]
+        with profiler.timer('scale'):
+            X = preprocess.transform(X)
+
+        profiler.count('clips predicted', len(X))
         if hasattr(self.model, 'predict_proba'):
-            proba = self.model.predict_proba(features_scaled)[0]
-            confidence = np.max(proba)
-        else:
-            confidence = None
+            with profiler.timer('predict'):
+                proba = self.model.predict_proba(X)
+            best = np.argmax(proba, axis=1)
+            categories = self.label_encoder.inverse_transform(self.model.classes_[best])
+            return categories, proba[np.arange(len(best)), best]
+
+        with profiler.timer('predict'):
+            predicted = self.model.predict(X)
+        return self.label_encoder.inverse_transform(predicted), None
+
+    @property
+    def selected_features(self):
+        """Positions kept from the full extract_features vector, or None without selection."""
+        selector = self.pipeline.named_steps.get('select')
+        return getattr(selector, 'indices_', None)
 
-        return category, confidence
+    def _select(self, X, y_encoded):
+        # Selection for partial_fit: fit once on the first batch, then frozen
+        selector = self.pipeline.named_steps.get('select')
+        if selector is None:
+            return X
+        if not hasattr(selector, 'indices_'):
+            selector.fit(X, y_encoded)
+        return selector.transform(X)
 
-    def cross_validate_analysis(self, X, y, n_folds=10):
+    def cross_validate_analysis(self, X, y, n_folds=10, n_jobs=None, groups=None):
         """
         Perform 10-fold cross-validation and analyze performance.
 
@@ -94,6 +273,11 @@ class AudioClassifier:
             X: Feature matrix
             y: Labels
             n_folds: Number of folds for cross-validation
+            n_jobs: Number of folds fitted in parallel (-1 = all cores)
+            groups: Source clip of every row (DataLoader.prepare_data with
+                return_groups). Folds then never split a clip's augmented
+                rows between training and testing. Mixup rows are not used
+                here, see SpectralAugmenter.mixup.
 
         Returns:
             Dictionary with cross-validation results
@@ -101,19 +285,22 @@ class AudioClassifier:
         # Encode labels
         y_encoded = self.label_encoder.fit_transform(y)
 
-        # Scale features first (we'll use pipeline-like approach in CV)
-        X_scaled = self.scaler.fit_transform(X)
-
-        cv = KFold(n_splits=n_folds, random_state=42, shuffle=True)
+        if groups is None:
+            cv = KFold(n_splits=n_folds, random_state=42, shuffle=True)
+        else:
+            cv = GroupKFold(n_splits=n_folds)
 
         metrics = ['accuracy', 'precision_macro', 'recall_macro', 'f1_macro']
         scoring = {metric: metric for metric in metrics}
+        # The scaler is refit inside every fold, so test folds never leak into scaling
         cv_results = cross_validate(
-            self.model,
-            X_scaled,
+            self.pipeline,
+            X,
             y_encoded,
             scoring = scoring,
             cv=cv,
+            groups=groups,
+            n_jobs=n_jobs,
             return_train_score=True)
 
         results = {}
@@ -135,8 +322,8 @@ class AudioClassifier:
                   f"Test Min: {results[metric]['test_min']:.4f}    "
                   f"Test Max: {results[metric]['test_max']:.4f}")
 
-        # Other reports
-        y_pred = self.model.predict(X_scaled)
+        # Other reports (from the model fitted by train)
+        y_pred = self.pipeline.predict(X)
 
         accuracy = accuracy_score(y_encoded, y_pred)
         print(f"\n\n --- Accuracy score --- \n\n Accuracy: {accuracy:.4f}")
@@ -146,30 +333,186 @@ class AudioClassifier:
         print("\n\n --- Confusion Matrix --- \n\n")
         print(confusion_matrix(y_encoded, y_pred))
 
+    def score(self, X, y):
+        """Accuracy on held-out data, using the fitted scaler and label encoder."""
+        y_encoded = self.label_encoder.transform(y)
+        return accuracy_score(y_encoded, self.pipeline.predict(X))
+
     def get_accuracy_score(self, X, y):
-        """Calculate accuracy score."""
-        X_scaled = self.scaler.fit_transform(X)
+        """Calculate accuracy score (the scaler fitted during training is reused, not refit)."""
+        return self.score(X, y)
+
+    def grid_search(self, X, y, param_grid, n_folds=5, n_jobs=None):
+        """
+        Grid search over pipeline hyperparameters with per-fold scaling.
+        Parameters are addressed through the pipeline, e.g.
+        {'model__n_estimators': [50, 100]}. With memory set, the scaler is
+        only fit once per fold no matter how many model settings are tried.
+
+        Returns:
+            Fitted GridSearchCV; the classifier is refit with the best parameters
+        """
         y_encoded = self.label_encoder.fit_transform(y)
-        y_pred = self.model.predict(X_scaled)
-        return accuracy_score(y_encoded, y_pred)
+        cv = KFold(n_splits=n_folds, random_state=42, shuffle=True)
+
+        search = GridSearchCV(self.pipeline, param_grid, cv=cv, scoring='accuracy', n_jobs=n_jobs)
+        search.fit(X, y_encoded)
+
+        self.pipeline = search.best_estimator_
+        self._sync_steps()
+        return search
+
+    def save_model(self, filepath='audio_classifier.pkl', compress=0):
+        """
+        Save the trained model, plus a small JSON header next to it
+        (filepath + '.json') describing the artifact.
 
-    def save_model(self, filepath='audio_classifier.pkl'):
-        """Save the trained model."""
+        Args:
+            filepath: Model file path
+            compress: joblib compression, 0 (none) to 9, or a (method, level)
+                tuple such as ('lz4', 3). Only uncompressed artifacts can be
+                memory-mapped by load_model.
+        """
         model_data = {
+            'pipeline': self.pipeline,
             'model': self.model,
             'scaler': self.scaler,
             'label_encoder': self.label_encoder,
-            'model_type': self.model_type
+            'model_type': self.model_type,
+            'scaler_type': self.scaler_type
         }
-        joblib.dump(model_data, filepath)
+        joblib.dump(model_data, filepath, compress=compress)
+
+        header = {
+            'format_version': MODEL_FORMAT_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'model_type': self.model_type,
+            'scaler_type': self.scaler_type,
+            'classes': [str(c) for c in self.label_encoder.classes_],
+            'n_features': int(getattr(self.scaler, 'n_features_in_', 0)),
+            'selected_features': None if self.selected_features is None else self.selected_features.tolist(),
+            'compress': compress,
+            'mmap_compatible': not compress,
+        }
+        with open(f"{filepath}.json", 'w') as f:
+            json.dump(header, f, indent=2)
         print(f"Model saved to {filepath}")
 
-    def load_model(self, filepath='audio_classifier.pkl'):
-        """Load a trained model."""
-        model_data = joblib.load(filepath)
+    def export_forest(self, filepath='audio_classifier.npz', extraction_params=None):
+        """
+        Exports the fitted scaler + random forest as plain numpy arrays for
+        inference.ForestModel, which evaluates them without scikit-learn.
+        With feature selection, the forest takes the selected columns only and
+        their positions are stored alongside.
+
+        The scaler is stored as x * factor + shift (all scalers here are
+        affine). Trees are concatenated into flat node tables; leaves point to
+        themselves so every sample can be walked a fixed number of steps.
+
+        Args:
+            filepath: Output .npz path, or a directory that receives one
+                uncompressed .npy file per array. inference.ForestModel
+                memory-maps the node tables of a directory export, so large
+                forests load without being read and are shared between
+                processes (a scikit-learn forest is always copied on unpickling).
+            extraction_params: DataLoader.extraction_params(), stored so the
+                inference side extracts the same features (without it,
+                inference uses the DataLoader and FeatureEngine defaults)
+        """
+        if self.model_type != 'random_forest':
+            raise ValueError("Only random_forest models can be exported")
+
+        n_features = self.scaler.n_features_in_
+        shift = self.scaler.transform(np.zeros((1, n_features)))[0]
+        factor = self.scaler.transform(np.ones((1, n_features)))[0] - shift
+
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in self.model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            counts = tree.value[:, 0, :]
+            value.append(counts / counts.sum(axis=1, keepdims=True))
+            roots.append(offset)
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        arrays = dict(
+            scaler_factor=factor,
+            scaler_shift=shift,
+            left=np.concatenate(left).astype(np.int32),
+            right=np.concatenate(right).astype(np.int32),
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold),
+            value=np.concatenate(value),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=self.label_encoder.classes_[self.model.classes_].astype(str),
+            selected=np.array([] if self.selected_features is None else self.selected_features, dtype=np.int32),
+            extraction_params=json.dumps(extraction_params or {}),
+        )
+        if filepath.endswith('.npz'):
+            np.savez(filepath, **arrays)
+        else:
+            os.makedirs(filepath, exist_ok=True)
+            for name, array in arrays.items():
+                np.save(os.path.join(filepath, f"{name}.npy"), array)
+        print(f"Forest exported to {filepath}")
+
+    @staticmethod
+    def read_model_header(filepath='audio_classifier.pkl'):
+        """
+        Reads the JSON header written by save_model without touching the model
+        file itself. Returns None for models saved before headers existed.
+        """
+        header_path = f"{filepath}.json"
+        if not os.path.exists(header_path):
+            return None
+        with open(header_path) as f:
+            return json.load(f)
+
+    def load_model(self, filepath='audio_classifier.pkl', mmap_mode=None):
+        """
+        Load a trained model.
+
+        Args:
+            filepath: Model file path
+            mmap_mode: Passed to joblib.load; 'r' memory-maps plain numpy
+                attributes of an uncompressed artifact (e.g. SVM support
+                vectors). Forest node tables are not among them: scikit-learn
+                copies them when a tree is unpickled. For a memory-mapped
+                forest, use export_forest to a directory and inference.ForestModel.
+        """
+        header = self.read_model_header(filepath)
+        if header is not None:
+            if header['format_version'] > MODEL_FORMAT_VERSION:
+                raise ValueError(f"{filepath} has format version {header['format_version']}, "
+                                 f"this code reads up to {MODEL_FORMAT_VERSION}")
+            if header['sklearn_version'] != sklearn.__version__:
+                print(f"Warning: {filepath} was saved with scikit-learn {header['sklearn_version']}, "
+                      f"running {sklearn.__version__}")
+            if mmap_mode is not None and not header['mmap_compatible']:
+                print(f"Warning: {filepath} is compressed and cannot be memory-mapped, loading it fully")
+                mmap_mode = None
+
+        model_data = joblib.load(filepath, mmap_mode=mmap_mode)
         self.model = model_data['model']
         self.scaler = model_data['scaler']
         self.label_encoder = model_data['label_encoder']
         self.model_type = model_data['model_type']
-        print(f"Model loaded from {filepath}")
+        self.scaler_type = model_data.get('scaler_type', self.scaler_type)
 
+        # Models saved before the pipeline refactor only store the steps
+        self.pipeline = model_data.get('pipeline')
+        if self.pipeline is None:
+            self.pipeline = Pipeline([('scaler', self.scaler), ('model', self.model)])
+        self._sync_steps()
+        print(f"Model loaded from {filepath}")
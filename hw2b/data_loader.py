@@ -1,13 +1,75 @@
 import os
-from pathlib import Path
-import librosa
-import librosa.feature
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import numpy as np
+import soundfile as sf
+import soxr
+from dataset_index import DatasetIndex
+from feature_engine import FeatureEngine
+from profiling import profiler
 
 class DataLoader:
 
+    def __init__(self, target_sr=16000, max_duration=30, resample_quality='HQ', block_size=65536, trim_db=20):
+        """
+        Args:
+            target_sr: Sampling rate every clip is resampled to
+            max_duration: Clips are capped to this many seconds
+            resample_quality: soxr quality, one of 'QQ', 'LQ', 'MQ', 'HQ', 'VHQ'
+                (faster to slower; 'HQ' matches librosa's default)
+            block_size: Frames read from disk per block when streaming a file
+            trim_db: Leading/trailing audio quieter than this many dB below
+                the clip's loudest frame is trimmed (None = keep everything)
+        """
+        self.target_sr = target_sr
+        self.max_duration = max_duration
+        self.resample_quality = resample_quality
+        self.block_size = block_size
+        self.trim_db = trim_db
+        self.feature_engine = FeatureEngine()
+
+    def _map(self, func, items, n_jobs=1, chunksize=16, label="Processed"):
+        """
+        Applies func to every item, serially or in a process pool, keeping
+        the input order. Prints progress and a clips/sec report.
 
-    def extract_features_from_data(self, data, mfcc_mean=True, mfcc_std=True, mel_mean=True, mel_std=True):
+        Args:
+            func: Picklable callable
+            items: List of inputs
+            n_jobs: Number of worker processes (1 = serial, -1 = all cores)
+            chunksize: Number of items sent to a worker at once
+            label: Verb used in the progress report
+        """
+        start = time.perf_counter()
+        total = len(items)
+        report_every = max(1, total // 10)
+        results = []
+
+        if n_jobs == 1:
+            iterator = map(func, items)
+            executor = None
+        else:
+            max_workers = os.cpu_count() if n_jobs == -1 else n_jobs
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+            iterator = executor.map(func, items, chunksize=chunksize)
+
+        try:
+            for i, result in enumerate(iterator, 1):
+                results.append(result)
+                if i % report_every == 0 or i == total:
+                    print(f"  {label} {i}/{total} clips")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed > 0 else float('inf')
+        print(f"{label} {total} clips in {elapsed:.2f}s ({rate:.1f} clips/sec, n_jobs={n_jobs})")
+        return results
+
+
+    def extract_features_from_data(self, data, mfcc_mean=True, mfcc_std=True, mel_mean=True, mel_std=True, n_jobs=1, chunksize=16):
         """
         Extract features and labels from loaded data.
 
@@ -17,27 +79,110 @@ class DataLoader:
             mfcc_std: Whether to include MFCC std features
             mel_mean: Whether to include Mel spectrogram mean features
             mel_std: Whether to include Mel spectrogram std features
+            n_jobs: Number of worker processes (1 = serial, using padded
+                batches; -1 = all cores, one clip at a time per worker)
+            chunksize: Number of clips sent to a worker at once
         Returns:
             X: List of feature vectors
             y: List of labels
         """
+        flags = dict(use_mfcc_mean=mfcc_mean, use_mfcc_std=mfcc_std, use_mel_mean=mel_mean, use_mel_std=mel_std)
+        if n_jobs == 1:
+            all_features = self.extract_features_batch(data, **flags)
+        else:
+            extract = partial(self._extract_clip_features, **flags)
+            all_features = self._map(extract, data, n_jobs, chunksize, label="Extracted features from")
+
         X = []
         y = []
-        for _, (x, sr, category) in enumerate(data):
-            features = self.extract_features(
-                y=x,
-                sr=sr,
-                use_mfcc_mean=mfcc_mean,
-                use_mfcc_std=mfcc_std,
-                use_mel_mean=mel_mean,
-                use_mel_std=mel_std)
-
+        for features, (_, _, category) in zip(all_features, data):
             if features is not None:
                 X.append(features)
                 y.append(category)
 
         return X, y
 
+    def extract_features_batch(self, data, n_mfcc=128, n_mels=128, use_mfcc_mean=True, use_mfcc_std=True, use_mel_mean=True, use_mel_std=True, verbose=True):
+        """
+        extract_features for many clips through FeatureEngine.batch_feature_blocks
+        (length-bucketed, padded batches instead of one STFT per clip).
+
+        Args:
+            data: List of tuples (y, sr, label)
+
+        Returns:
+            List of feature vectors, in the order of data
+        """
+        start = time.perf_counter()
+        names = [name for name, used in zip(FeatureEngine.BLOCK_NAMES, [use_mfcc_mean, use_mfcc_std, use_mel_mean, use_mel_std]) if used]
+
+        # Batches need a common sampling rate
+        all_features = [None] * len(data)
+        for sr in sorted({clip_sr for _, clip_sr, _ in data}):
+            indices = [i for i, (_, clip_sr, _) in enumerate(data) if clip_sr == sr]
+            blocks = self.feature_engine.batch_feature_blocks([data[i][0] for i in indices], sr, n_mfcc=n_mfcc, n_mels=n_mels)
+            for i, clip_blocks in zip(indices, blocks):
+                all_features[i] = np.concatenate([clip_blocks[name] for name in names])
+        profiler.count('clips featurized', len(data))
+
+        if verbose:
+            elapsed = time.perf_counter() - start
+            rate = len(data) / elapsed if elapsed > 0 else float('inf')
+            print(f"Extracted features from {len(data)} clips in {elapsed:.2f}s ({rate:.1f} clips/sec, batched)")
+        return all_features
+
+    def _extract_clip_features(self, clip, **kwargs):
+        x, sr, _ = clip
+        return self.extract_features(y=x, sr=sr, **kwargs)
+
+    def _load_and_extract(self, path, **kwargs):
+        x, sr = self.load_wav_file(path)
+        return self.extract_features(y=x, sr=sr, **kwargs)
+
+    def extraction_params(self, n_mfcc=128, n_mels=128):
+        """Everything that changes the extracted features, used to key the feature store."""
+        return {
+            'target_sr': self.target_sr,
+            'max_duration': self.max_duration,
+            'resample_quality': self.resample_quality,
+            'trim_db': self.trim_db,
+            'n_fft': self.feature_engine.n_fft,
+            'hop_length': self.feature_engine.hop_length,
+            'n_mfcc': n_mfcc,
+            'n_mels': n_mels,
+        }
+
+    def _stored_blocks(self, path, store, n_mfcc=128, n_mels=128):
+        params = self.extraction_params(n_mfcc, n_mels)
+        blocks = store.get(path, params)
+        if blocks is None:
+            x, sr = self.load_wav_file(path)
+            blocks = self.feature_engine.feature_blocks(x, sr, n_mfcc=n_mfcc, n_mels=n_mels)
+            store.put(path, params, blocks)
+        return blocks
+
+    def load_feature_blocks(self, data_dir, categories, store, n_files=20, n_mfcc=128, n_mels=128, n_jobs=1, chunksize=16):
+        """
+        Loads every feature block for the dataset, extracting only the clips
+        missing from the feature store.
+
+        Args:
+            data_dir: Root directory containing category folders
+            categories: List of category names (folder names)
+            store: FeatureStore
+            n_files: Number of files to take per category
+
+        Returns:
+            blocks: Dictionary of block name -> (n_clips, dim) array
+            y: Array of labels
+        """
+        files = self.list_wavs(data_dir, categories, n_files=n_files, n_jobs=n_jobs)
+        stored = partial(self._stored_blocks, store=store, n_mfcc=n_mfcc, n_mels=n_mels)
+        clip_blocks = self._map(stored, [path for path, _ in files], n_jobs, chunksize, label="Loaded feature blocks for")
+
+        blocks = {name: np.array([b[name] for b in clip_blocks]) for name in FeatureEngine.BLOCK_NAMES}
+        return blocks, np.array([category for _, category in files])
+
     """
     Transform the raw audio waveform into features that are more informative for machine learning models.
     Features include:
@@ -57,16 +202,13 @@ class DataLoader:
         Returns:
             Feature vector
         """
-        # Extract MFCCs
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
-        mfccs_mean = np.mean(mfccs, axis=1)
-        mfccs_std = np.std(mfccs, axis=1)
-
-        # Extract Mel spectrogram
-        mel_spec = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels)
-        mel_spec_db = librosa.power_to_db(mel_spec, ref=np.max)
-        mel_mean = np.mean(mel_spec_db, axis=1)
-        mel_std = np.std(mel_spec_db, axis=1)
+        # Extract MFCCs and Mel spectrogram from a single STFT
+        blocks = self.feature_engine.feature_blocks(y, sr, n_mfcc=n_mfcc, n_mels=n_mels)
+        profiler.count('clips featurized')
+        mfccs_mean = blocks['mfcc_mean']
+        mfccs_std = blocks['mfcc_std']
+        mel_mean = blocks['mel_mean']
+        mel_std = blocks['mel_std']
 
         # Combine features
         features = []
@@ -83,27 +225,185 @@ class DataLoader:
 
         return features
 
-    def prepare_data(self, data_dir, categories, n_files=20, mfcc_mean=True, mfcc_std=True, mel_mean=True, mel_std=True):
+    def prepare_data(self, data_dir, categories, n_files=20, mfcc_mean=True, mfcc_std=True, mel_mean=True, mel_std=True, n_jobs=1, chunksize=16, out_path=None, augmenter=None, return_groups=False):
         """
         Prepare training data from directory structure.
 
         Args:
             data_dir: Root directory containing category folders
             categories: List of category names (folder names)
+            n_jobs: Number of worker processes (1 = serial, -1 = all cores).
+                In parallel mode each worker runs load -> resample ->
+                normalize -> features for its files, so only feature
+                vectors travel back to the main process.
+            chunksize: Number of files sent to a worker at once
+            out_path: Optional .npy path; features are then written to a
+                memory-mapped matrix there instead of RAM (see extract_to_matrix)
+            augmenter: Optional SpectralAugmenter; every clip then contributes
+                its own row followed by its augmented rows (see extract_augmented)
+            return_groups: Also return the source clip index of every row,
+                for grouped cross-validation of augmented data
 
         Returns:
-            X (features), y (labels)
+            X (features), y (labels) (and groups when return_groups is set)
         """
+        files = self.list_wavs(data_dir, categories, n_files=n_files, n_jobs=n_jobs)
+        options = {'use_mfcc_mean': mfcc_mean, 'use_mfcc_std': mfcc_std, 'use_mel_mean': mel_mean, 'use_mel_std': mel_std}
+
+        if augmenter is not None:
+            if out_path is not None:
+                raise ValueError("out_path is not supported together with augmenter")
+            X, y, groups = self.extract_augmented(files, augmenter, n_jobs=n_jobs, chunksize=chunksize, **options)
+        else:
+            X, y = self.extract_to_matrix(files, out_path=out_path, n_jobs=n_jobs, chunksize=chunksize, **options)
+            groups = np.arange(len(files))
+
+        if return_groups:
+            return X, y, groups
+        return X, y
 
-        data = self.load_wavs(data_dir, categories, n_files=n_files)
-        X, y = self.extract_features_from_data(data, mfcc_mean, mfcc_std, mel_mean, mel_std)
+    def _augmented_rows(self, item, augmenter, names, n_mfcc=128, n_mels=128):
+        index, path = item
+        x, sr = self.load_wav_file(path)
+        blocks = augmenter.clip_blocks(self.feature_engine, x, sr, augmenter.clip_rng(index), n_mfcc=n_mfcc, n_mels=n_mels)
+        return np.array([np.concatenate([clip_blocks[name] for name in names]) for clip_blocks in blocks])
 
-        return np.array(X), np.array(y)
+    def extract_augmented(self, files, augmenter, n_jobs=1, chunksize=16, n_mfcc=128, n_mels=128, use_mfcc_mean=True, use_mfcc_std=True, use_mel_mean=True, use_mel_std=True):
+        """
+        Feature rows of every clip plus its augmentations. Each clip is
+        decoded and transformed once; its augmented rows are derived from the
+        cached Mel spectrograms (see SpectralAugmenter). Mixup rows are not
+        added here, since they combine clips and must only be made after a
+        split (see SpectralAugmenter.mixup).
 
-    def load_wavs(self, data_dir, categories, n_files=20):
+        Args:
+            files: List of tuples (path, label)
+            augmenter: SpectralAugmenter
+
+        Returns:
+            X: Feature matrix, rows of a clip consecutive
+            y: Array of labels
+            groups: Source clip index (position in files) of every row
+        """
+        names = [name for name, used in zip(FeatureEngine.BLOCK_NAMES, [use_mfcc_mean, use_mfcc_std, use_mel_mean, use_mel_std]) if used]
+        rows = partial(self._augmented_rows, augmenter=augmenter, names=names, n_mfcc=n_mfcc, n_mels=n_mels)
+        clip_rows = self._map(rows, list(enumerate(path for path, _ in files)), n_jobs, chunksize, label="Augmented")
+
+        X = np.vstack(clip_rows)
+        groups = np.repeat(np.arange(len(files)), [len(r) for r in clip_rows])
+        y = np.array([category for _, category in files])[groups]
+
+        print(f"{len(files)} clips -> {len(X)} training rows")
+        return X, y, groups
+
+    def iter_features(self, files, chunk_size=16, n_jobs=1, chunksize=16, **kwargs):
+        """
+        Loads and featurizes files chunk by chunk. Serially, a chunk of
+        waveforms is decoded, batch-extracted and dropped before the next is
+        read; in parallel, workers only send back feature vectors. Either way
+        no more than one chunk of audio is alive at a time.
+
+        Args:
+            files: List of tuples (path, label), e.g. from list_wavs
+            chunk_size: Files per yielded chunk
+            n_jobs: Number of worker processes (1 = serial, -1 = all cores)
+            chunksize: Number of files sent to a worker at once
+            kwargs: extract_features options (n_mfcc, n_mels, use_mfcc_mean, ...)
+
+        Yields:
+            start: Index in files of the first row of the chunk
+            X: Feature matrix of the chunk
+            y: Labels of the chunk
+        """
+        if n_jobs == 1:
+            for start in range(0, len(files), chunk_size):
+                chunk = files[start : start + chunk_size]
+                data = [(*self.load_wav_file(path), category) for path, category in chunk]
+                yield start, np.array(self.extract_features_batch(data, verbose=False, **kwargs)), [c for _, c in chunk]
+            return
+
+        max_workers = os.cpu_count() if n_jobs == -1 else n_jobs
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = executor.map(partial(self._load_and_extract, **kwargs), [path for path, _ in files], chunksize=chunksize)
+            for start in range(0, len(files), chunk_size):
+                chunk = files[start : start + chunk_size]
+                yield start, np.array([next(rows) for _ in chunk]), [c for _, c in chunk]
+
+    def feature_dim(self, n_mfcc=128, n_mels=128, use_mfcc_mean=True, use_mfcc_std=True, use_mel_mean=True, use_mel_std=True):
+        """Length of the vectors extract_features returns for these options."""
+        return n_mfcc * (use_mfcc_mean + use_mfcc_std) + n_mels * (use_mel_mean + use_mel_std)
+
+    def extract_to_matrix(self, files, out_path=None, dtype=np.float64, chunk_size=16, n_jobs=1, chunksize=16, **kwargs):
+        """
+        Streams files through iter_features straight into a preallocated
+        feature matrix, so memory is one chunk of audio plus the matrix itself
+        (or nothing beyond the page cache when out_path is given).
+
+        Args:
+            files: List of tuples (path, label)
+            out_path: None for an in-memory matrix, or a .npy path for a
+                memory-mapped one (np.load(out_path, mmap_mode='r') reopens it)
+            dtype: Matrix dtype (float32 halves the size)
+            kwargs: extract_features options
+
+        Returns:
+            X: (len(files), feature_dim) matrix, np.ndarray or np.memmap
+            y: Array of labels
+        """
+        start_time = time.perf_counter()
+        shape = (len(files), self.feature_dim(**kwargs))
+        if out_path is None:
+            X = np.empty(shape, dtype=dtype)
+        else:
+            X = np.lib.format.open_memmap(out_path, mode='w+', dtype=dtype, shape=shape)
+
+        report_every = max(1, len(files) // 10)
+        for start, X_chunk, _ in self.iter_features(files, chunk_size=chunk_size, n_jobs=n_jobs, chunksize=chunksize, **kwargs):
+            end = start + len(X_chunk)
+            X[start:end] = X_chunk
+            if end // report_every > start // report_every or end == len(files):
+                print(f"  Loaded and extracted {end}/{len(files)} clips")
+
+        if out_path is not None:
+            X.flush()
+
+        elapsed = time.perf_counter() - start_time
+        rate = len(files) / elapsed if elapsed > 0 else float('inf')
+        print(f"Loaded and extracted {len(files)} clips in {elapsed:.2f}s ({rate:.1f} clips/sec, n_jobs={n_jobs})")
+        return X, np.array([category for _, category in files])
+
+    def list_wavs(self, data_dir, categories, n_files=20, seed=None, n_jobs=1):
         """
         Get list of WAV file paths and their corresponding labels.
 
+        Files come from the persistent DatasetIndex of data_dir, which is
+        refreshed first (only new or modified files are probed), so the
+        selection is deterministic and no directory is re-read into memory.
+
+        Args:
+            data_dir: Root directory containing category folders
+            categories: List of category names (folder names)
+            n_files: Number of files to take per category
+            seed: None for the first n_files in path order, an integer for a
+                reproducible random subset per category
+            n_jobs: Worker processes for probing new or modified files (-1 = all cores)
+
+        Returns:
+            List of tuples (path, label)
+        """
+        index = DatasetIndex(data_dir)
+        index.update(categories, n_jobs=n_jobs)
+
+        files = index.sample(categories, n_files=n_files, seed=seed)
+        for category in categories:
+            print(f"Loading {sum(1 for _, c in files if c == category)} files from {category}")
+
+        return files
+
+    def load_wavs(self, data_dir, categories, n_files=20, n_jobs=1, chunksize=16):
+        """
+        Load WAV files and their corresponding labels.
+
         Expected structure:
         data/
             category1/
@@ -119,43 +419,196 @@ class DataLoader:
             data_dir: Root directory containing category folders
             categories: List of category names (folder names)
             n_files: Number of files to load per category
-        """
-
-        data = []
-
-        for category in categories:
-            wavs_path = Path(data_dir) / category / "wavs"
-
-            if not wavs_path.exists():
-                print(f"Warning: {wavs_path} does not exist")
-                continue
-
-            audio_paths = os.listdir(wavs_path)
-            print(f"Loading {n_files} files from {category}")
+            n_jobs: Number of worker processes (1 = serial, -1 = all cores)
+            chunksize: Number of files sent to a worker at once
 
+        Returns:
+            List of tuples (y, sr, label)
+        """
 
-            for file_path in audio_paths[:n_files]:
-                audio_path = wavs_path / file_path
-                x, sr = self.load_wav_file(audio_path)
-                data.append((x, sr, category))
+        files = self.list_wavs(data_dir, categories, n_files=n_files, n_jobs=n_jobs)
+        loaded = self._map(self.load_wav_file, [path for path, _ in files], n_jobs, chunksize, label="Loaded")
 
-        return data
+        return [(x, sr, category) for (x, sr), (_, category) in zip(loaded, files)]
 
     """
     Load and preprocess audio files for machine learning tasks.
     This includes loading WAV files, resampling to a consistent sample rate,
     normalizing amplitude, and trimming silence.
     """
-    def load_wav_file(self, path):
-        y, sr = librosa.load(path, sr=44100, duration=30)
-        if sr != 16000:
-            y = librosa.resample(y=y, orig_sr=sr, target_sr=16000)
-            sr = 16000
+    def load_wav_file(self, path, return_trim=False):
+        """
+        Args:
+            path: Audio file path
+            return_trim: Also return (start, end, original length) in samples
+                at target_sr, i.e. which part of the loaded audio was kept
+
+        Returns:
+            y, sr (and the trim tuple when return_trim is set)
+        """
+        try:
+            y = self.read_resampled(path)
+        except (sf.LibsndfileError, RuntimeError):
+            # Formats libsndfile cannot decode still go through librosa, resampling
+            # once. Imported here so the common path never pays for librosa/numba.
+            import librosa
+            with profiler.timer('decode'):
+                y, _ = librosa.load(path, sr=self.target_sr, duration=self.max_duration, res_type=f"soxr_{self.resample_quality.lower()}")
+        sr = self.target_sr
+        profiler.count('clips loaded')
+        profiler.count('samples loaded', len(y))
 
         # Scale the audio amplitude to a consistent range (e.g., -1 to 1) to prevent bias towards louder signals.
-        y = librosa.util.normalize(y)
+        with profiler.timer('normalize'):
+            y = self.normalize(y)
 
         # Trim silence from the beginning and end of audio clips
-        librosa.effects.trim(y, top_db=20)
+        original_length = len(y)
+        with profiler.timer('trim'):
+            start, end = self.trim_bounds(y)
+        y = y[start:end]
+
+        if return_trim:
+            return y, sr, (start, end, original_length)
+        return y, sr
 
-        return y, sr
\ No newline at end of file
+    def frame_energy_db(self, y, frame_length=2048, hop_length=512):
+        """
+        Per-frame energy in dB relative to the loudest frame, computed for all
+        frames at once from a running sum of squares. Frames are centered and
+        zero padded, so this equals librosa.feature.rms(...) ** 2 in dB as used
+        by librosa.effects.trim.
+
+        Returns:
+            Array of 1 + len(y) // hop_length values <= 0
+        """
+        pad = frame_length // 2
+        power = np.concatenate([[0.0], np.cumsum(np.pad(np.asarray(y, dtype=np.float64) ** 2, pad))])
+        starts = np.arange(1 + len(y) // hop_length) * hop_length
+        mse = (power[starts + frame_length] - power[starts]) / frame_length
+
+        db = 10.0 * np.log10(np.maximum(mse, 1e-10))
+        return db - db.max()
+
+    def nonsilent_intervals(self, y, top_db=None, frame_length=2048, hop_length=512):
+        """
+        Sample intervals whose frame energy is within top_db of the loudest
+        frame, like librosa.effects.split.
+
+        Returns:
+            Array of shape (n_intervals, 2) with [start, end) sample indices
+        """
+        top_db = self.trim_db if top_db is None else top_db
+        loud = self.frame_energy_db(y, frame_length, hop_length) > -top_db
+
+        # Rising and falling edges of the loud mask
+        edges = np.flatnonzero(np.diff(np.concatenate([[False], loud, [False]]).astype(np.int8)))
+        intervals = edges.reshape(-1, 2) * hop_length
+        return np.minimum(intervals, len(y))
+
+    def trim_bounds(self, y):
+        """
+        [start, end) of y once leading and trailing silence is removed, like
+        librosa.effects.trim(y, top_db=trim_db). Silent or empty clips are
+        kept whole rather than trimmed to nothing.
+        """
+        if self.trim_db is None or len(y) == 0:
+            return 0, len(y)
+        intervals = self.nonsilent_intervals(y)
+        if len(intervals) == 0:
+            return 0, len(y)
+        return int(intervals[0, 0]), int(intervals[-1, 1])
+
+    def _trim_stats(self, path):
+        _, _, (start, end, original_length) = self.load_wav_file(path, return_trim=True)
+        return original_length, end - start
+
+    def trim_report(self, data_dir, categories, n_files=20, n_jobs=1, chunksize=16):
+        """
+        Prints how much audio silence trimming removes per category, i.e. the
+        share of STFT frames feature extraction no longer computes.
+
+        Returns:
+            Dictionary of category -> (original seconds, retained seconds)
+        """
+        files = self.list_wavs(data_dir, categories, n_files=n_files, n_jobs=n_jobs)
+        stats = self._map(self._trim_stats, [path for path, _ in files], n_jobs, chunksize, label="Trimmed")
+
+        report = {}
+        for (original, retained), (_, category) in zip(stats, files):
+            total = report.get(category, (0.0, 0.0))
+            report[category] = (total[0] + original / self.target_sr, total[1] + retained / self.target_sr)
+
+        print(f"\nSilence trimming (top_db={self.trim_db}):")
+        for category, (original, retained) in report.items():
+            saved = 1 - retained / original if original > 0 else 0.0
+            print(f"  {category:<12} {original:8.1f}s -> {retained:8.1f}s  ({saved:.1%} less audio to featurize)")
+        original = sum(o for o, _ in report.values())
+        retained = sum(r for _, r in report.values())
+        if original > 0:
+            print(f"  {'total':<12} {original:8.1f}s -> {retained:8.1f}s  ({1 - retained / original:.1%} less audio to featurize)")
+        return report
+
+    @staticmethod
+    def normalize(y):
+        """Peak normalization, same as librosa.util.normalize with its defaults."""
+        peak = np.max(np.abs(y)) if len(y) else 0.0
+        if peak < np.finfo(y.dtype).tiny:
+            return y
+        return y / peak
+
+    def read_resampled(self, path):
+        """
+        Reads at most max_duration seconds of a file at its native rate and
+        resamples it once, directly to target_sr. The file is streamed in
+        blocks through a soxr stream, so only the capped part is ever decoded
+        and peak memory does not depend on the file length.
+
+        Returns:
+            Mono float32 waveform at target_sr
+        """
+        chunks = list(self.stream_resampled(path, max_duration=self.max_duration))
+        if not chunks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(chunks)
+
+    def stream_resampled(self, path, max_duration=None):
+        """
+        Yields a file as mono float32 blocks at target_sr, reading block_size
+        frames at a time, so arbitrarily long recordings can be processed in
+        bounded memory.
+
+        Args:
+            path: Audio file path
+            max_duration: Stop after this many seconds (None = whole file)
+        """
+        # Only the calls are timed: the caller runs between yields
+        with profiler.timer('decode'):
+            f = sf.SoundFile(path)
+        with f:
+            native_sr = f.samplerate
+            frames_left = f.frames if max_duration is None else min(f.frames, int(max_duration * native_sr))
+
+            resampler = None
+            if native_sr != self.target_sr:
+                resampler = soxr.ResampleStream(native_sr, self.target_sr, 1, dtype='float32', quality=self.resample_quality)
+
+            while frames_left > 0:
+                with profiler.timer('decode'):
+                    block = f.read(min(self.block_size, frames_left), dtype='float32', always_2d=True)
+                if len(block) == 0:
+                    break
+                frames_left -= len(block)
+
+                # Downmix to mono like librosa.load
+                mono = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+                if resampler is not None:
+                    with profiler.timer('resample'):
+                        mono = resampler.resample_chunk(mono, last=frames_left <= 0)
+                yield mono
+
+            if resampler is not None and frames_left > 0:
+                # File ended early, flush what is left in the resampler
+                with profiler.timer('resample'):
+                    tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+                yield tail
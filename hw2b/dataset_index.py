@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import soundfile as sf
+
+def probe(path):
+    """
+    Header-only description of one audio file plus its content hash. The
+    samples are never decoded.
+
+    Returns:
+        Dictionary with duration, sr, channels, frames and hash (duration and
+        friends are None if libsndfile cannot read the header)
+    """
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+
+    try:
+        info = sf.info(path)
+        header = {'duration': info.frames / info.samplerate, 'sr': info.samplerate,
+                  'channels': info.channels, 'frames': info.frames}
+    except (sf.LibsndfileError, RuntimeError):
+        header = {'duration': None, 'sr': None, 'channels': None, 'frames': None}
+
+    return {**header, 'hash': sha.hexdigest()}
+
+class DatasetIndex:
+    """
+    Persistent index of a data/<category>/wavs/<file> tree.
+
+    Each file is recorded with its size, mtime, duration, sampling rate and
+    content hash. update() only probes files that are new or whose size or
+    mtime changed, so after the first run it costs one directory scan.
+    Selection and queries then run on the index without opening any audio.
+    """
+
+    def __init__(self, data_dir, index_path=None):
+        """
+        Args:
+            data_dir: Root directory containing category folders
+            index_path: JSON file holding the index (default: data_dir/.dataset_index.json)
+        """
+        self.data_dir = Path(data_dir)
+        self.index_path = Path(index_path) if index_path else self.data_dir / '.dataset_index.json'
+        self.entries = {}
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                self.entries = json.load(f)
+
+    def scan(self, categories):
+        """Current (relative path, category, size, mtime) of every file, without probing."""
+        files = []
+        for category in categories:
+            wavs_path = self.data_dir / category / "wavs"
+            if not wavs_path.exists():
+                print(f"Warning: {wavs_path} does not exist")
+                continue
+            with os.scandir(wavs_path) as it:
+                for entry in it:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files.append((f"{category}/wavs/{entry.name}", category, stat.st_size, stat.st_mtime))
+        return files
+
+    def update(self, categories, n_jobs=1):
+        """
+        Brings the index up to date for the given categories and saves it.
+
+        Args:
+            categories: Category folder names to index
+            n_jobs: Worker processes for probing new/changed files (-1 = all cores)
+
+        Returns:
+            Number of files that had to be probed
+        """
+        start = time.perf_counter()
+        files = self.scan(categories)
+
+        stale = [(rel, category, size, mtime) for rel, category, size, mtime in files
+                 if rel not in self.entries
+                 or self.entries[rel]['size'] != size
+                 or self.entries[rel]['mtime'] != mtime]
+
+        paths = [str(self.data_dir / rel) for rel, _, _, _ in stale]
+        if n_jobs == 1 or len(paths) < 2:
+            probed = list(map(probe, paths))
+        else:
+            with ProcessPoolExecutor(max_workers=os.cpu_count() if n_jobs == -1 else n_jobs) as executor:
+                probed = list(executor.map(probe, paths, chunksize=16))
+
+        for (rel, category, size, mtime), info in zip(stale, probed):
+            self.entries[rel] = {'path': rel, 'label': category, 'size': size, 'mtime': mtime, **info}
+
+        # Forget files that disappeared from the indexed categories
+        present = {rel for rel, _, _, _ in files}
+        removed = [rel for rel, entry in self.entries.items() if entry['label'] in categories and rel not in present]
+        for rel in removed:
+            del self.entries[rel]
+
+        if stale or removed:
+            self.save()
+        print(f"Indexed {len(files)} files ({len(stale)} probed, {len(removed)} removed) in {time.perf_counter() - start:.2f}s")
+        return len(stale)
+
+    def save(self):
+        # Write then rename so an interrupted run never leaves a partial index
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def query(self, label=None, min_duration=None, max_duration=None, sr=None):
+        """
+        Entries matching every given condition, sorted by path. Files whose
+        header could not be read are never returned by duration/sr filters.
+
+        Example:
+            index.query(label='music', min_duration=5.0)
+        """
+        results = []
+        for entry in self.entries.values():
+            if label is not None and entry['label'] != label:
+                continue
+            if (min_duration is not None or max_duration is not None or sr is not None) and entry['duration'] is None:
+                continue
+            if min_duration is not None and entry['duration'] < min_duration:
+                continue
+            if max_duration is not None and entry['duration'] > max_duration:
+                continue
+            if sr is not None and entry['sr'] != sr:
+                continue
+            results.append(entry)
+        return sorted(results, key=lambda entry: entry['path'])
+
+    def sample(self, categories, n_files=20, seed=None, **filters):
+        """
+        Deterministic stratified selection of up to n_files per category.
+
+        Args:
+            categories: Category names, in the order of the returned list
+            n_files: Files per category
+            seed: None takes the first n_files in path order; an integer takes
+                a seeded random subset (same seed, same files)
+            filters: Extra query() conditions, e.g. min_duration=1.0
+
+        Returns:
+            List of tuples (path, label)
+        """
+        files = []
+        for category in categories:
+            entries = self.query(label=category, **filters)
+            if seed is not None:
+                rng = np.random.default_rng([seed, *category.encode('utf-8')])
+                entries = [entries[i] for i in sorted(rng.permutation(len(entries))[:n_files])]
+            for entry in entries[:n_files]:
+                files.append((self.data_dir / entry['path'], category))
+        return files
@@ -0,0 +1,118 @@
+import csv
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold
+from threadpoolctl import threadpool_limits
+from classifier import AudioClassifier
+from feature_engine import FeatureEngine
+from feature_store import FeatureStore
+
+def config_name(config):
+    """Readable name of a configuration, e.g. random_forest_standard_mfccMean_melStd."""
+    name = f"{config['model_type']}_{config['scaler_type']}"
+    suffixes = {'mfcc_mean': 'mfccMean', 'mfcc_std': 'mfccStd', 'mel_mean': 'melMean', 'mel_std': 'melStd'}
+    for block in FeatureEngine.BLOCK_NAMES:
+        if config[block]:
+            name += f"_{suffixes[block]}"
+    return name
+
+def run_fold(config, X, y, train_idx, test_idx):
+    """
+    Fits one configuration on one fold. BLAS/OpenMP pools are limited to one
+    thread because parallelism already comes from running folds side by side.
+    """
+    with threadpool_limits(limits=1):
+        classifier = AudioClassifier(model_type=config['model_type'], scaler_type=config['scaler_type'])
+
+        start = time.perf_counter()
+        classifier.fit(X[train_idx], y[train_idx])
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        accuracy = classifier.score(X[test_idx], y[test_idx])
+        predict_time = time.perf_counter() - start
+
+    return {'accuracy': accuracy, 'fit_time': fit_time, 'predict_time': predict_time}
+
+class ExperimentRunner:
+    """
+    Runs feature-set / model configurations x cross-validation folds in
+    parallel and summarizes accuracy and timing per configuration.
+    """
+
+    def __init__(self, n_folds=5, n_jobs=-1, random_state=42):
+        """
+        Args:
+            n_folds: Number of stratified folds per configuration
+            n_jobs: joblib workers (-1 = all cores)
+        """
+        self.n_folds = n_folds
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def run(self, blocks, y, configs):
+        """
+        Args:
+            blocks: Feature blocks from DataLoader.load_feature_blocks
+            y: Labels
+            configs: List of dicts with model_type, scaler_type and one boolean per feature block
+
+        Returns:
+            List of result dicts, one per configuration
+        """
+        y = np.asarray(y)
+        cv = StratifiedKFold(n_splits=self.n_folds, shuffle=True, random_state=self.random_state)
+        folds = list(cv.split(np.zeros(len(y)), y))
+
+        matrices = [FeatureStore.select(blocks, [b for b in FeatureEngine.BLOCK_NAMES if c[b]]) for c in configs]
+
+        start = time.perf_counter()
+        fold_results = Parallel(n_jobs=self.n_jobs)(
+            delayed(run_fold)(config, X, y, train_idx, test_idx)
+            for config, X in zip(configs, matrices)
+            for train_idx, test_idx in folds
+        )
+        print(f"Ran {len(configs)} configurations x {self.n_folds} folds in {time.perf_counter() - start:.2f}s")
+
+        results = []
+        for i, config in enumerate(configs):
+            runs = fold_results[i * self.n_folds : (i + 1) * self.n_folds]
+            accuracies = [r['accuracy'] for r in runs]
+            results.append({
+                'name': config_name(config),
+                **config,
+                'n_features': matrices[i].shape[1],
+                'accuracy_mean': float(np.mean(accuracies)),
+                'accuracy_std': float(np.std(accuracies)),
+                'fit_time': float(np.mean([r['fit_time'] for r in runs])),
+                'predict_time': float(np.mean([r['predict_time'] for r in runs])),
+            })
+
+        return results
+
+    def write_results(self, results, output_path='ablation_results.csv'):
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"Results written to {output_path}")
+
+    def plot_results(self, results, output_path='ablation_study.png'):
+        """
+        Saves a bar plot of mean accuracy per configuration. Uses a bare
+        Figure (no pyplot window), so it never blocks.
+        """
+        from matplotlib.figure import Figure
+
+        ordered = sorted(results, key=lambda r: r['accuracy_mean'], reverse=True)
+        fig = Figure(figsize=(12, 6))
+        ax = fig.add_subplot()
+        ax.barh([r['name'] for r in ordered], [r['accuracy_mean'] for r in ordered],
+                xerr=[r['accuracy_std'] for r in ordered], color='skyblue')
+        ax.set_xlabel('Accuracy')
+        ax.set_title('Ablation Study: Impact of Different Feature Sets on Accuracy')
+        ax.set_xlim(0, 1)
+        fig.tight_layout()
+        fig.savefig(output_path)
+        print(f"Plot saved to {output_path}")
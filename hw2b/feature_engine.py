@@ -0,0 +1,367 @@
+"""
+Single-pass MFCC + Mel spectrogram features.
+
+librosa.feature.mfcc and librosa.feature.melspectrogram each compute their
+own STFT and Mel projection. Here the power spectrogram is computed once per
+clip and both features are derived from it, with the Mel filterbank and DCT
+matrices cached per configuration.
+
+Only numpy is used (no librosa/numba import), so inference processes start
+fast; results match librosa's defaults to float32 precision.
+"""
+
+from functools import lru_cache
+import numpy as np
+from profiling import profiler
+
+def hz_to_mel(frequencies):
+    """Slaney mel scale: linear below 1 kHz, logarithmic above (librosa.hz_to_mel, htk=False)."""
+    frequencies = np.asarray(frequencies, dtype=float)
+    f_sp = 200.0 / 3
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    return np.where(frequencies >= min_log_hz,
+                    min_log_mel + np.log(np.maximum(frequencies, min_log_hz) / min_log_hz) / logstep,
+                    frequencies / f_sp)
+
+def mel_to_hz(mels):
+    """Inverse of hz_to_mel."""
+    mels = np.asarray(mels, dtype=float)
+    f_sp = 200.0 / 3
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    return np.where(mels >= min_log_mel, min_log_hz * np.exp(logstep * (mels - min_log_mel)), f_sp * mels)
+
+@lru_cache(maxsize=None)
+def mel_basis(sr, n_fft, n_mels):
+    """Mel filterbank, same as librosa.filters.mel (Slaney scale and norm)."""
+    fft_freqs = np.linspace(0, sr / 2, 1 + n_fft // 2)
+    mel_f = mel_to_hz(np.linspace(hz_to_mel(0.0), hz_to_mel(sr / 2), n_mels + 2))
+
+    fdiff = np.diff(mel_f)
+    ramps = np.subtract.outer(mel_f, fft_freqs)
+    lower = -ramps[:-2] / fdiff[:-1, None]
+    upper = ramps[2:] / fdiff[1:, None]
+    basis = np.maximum(0, np.minimum(lower, upper))
+
+    # Slaney normalization: each filter has unit area
+    basis *= (2.0 / (mel_f[2:] - mel_f[:-2]))[:, None]
+    basis = basis.astype(np.float32)
+    basis.setflags(write=False)
+    return basis
+
+@lru_cache(maxsize=None)
+def hann_window(n_fft):
+    """Periodic Hann window, as used by librosa.stft."""
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)
+    window.setflags(write=False)
+    return window
+
+@lru_cache(maxsize=None)
+def dct_matrix(n_mels, n_mfcc):
+    """
+    First n_mfcc rows of the orthonormal DCT-II over n_mels bands,
+    equivalent to scipy.fft.dct(..., type=2, norm='ortho') as used by librosa.
+    """
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)
+    basis[0] /= np.sqrt(2.0)
+    basis.setflags(write=False)
+    return basis
+
+def power_to_db(S, ref=1.0, amin=1e-10, top_db=80.0):
+    """librosa.power_to_db for a scalar ref."""
+    log_spec = 10.0 * np.log10(np.maximum(amin, S))
+    log_spec -= 10.0 * np.log10(np.maximum(amin, ref))
+    if top_db is not None:
+        log_spec = np.maximum(log_spec, log_spec.max() - top_db)
+    return log_spec
+
+class FeatureEngine:
+    """
+    Computes the power spectrogram once and derives Mel and MFCC from it.
+    Defaults match librosa.feature.melspectrogram / librosa.feature.mfcc.
+    """
+
+    # librosa.feature.mfcc always projects onto 128 Mel bands by default,
+    # independently of how many bands the Mel spectrogram features use
+    MFCC_N_MELS = 128
+
+    BLOCK_NAMES = ['mfcc_mean', 'mfcc_std', 'mel_mean', 'mel_std']
+
+    def __init__(self, n_fft=2048, hop_length=512):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+
+    def power_spectrogram(self, y):
+        """Power of a centered (zero padded) STFT, like librosa.stft with its defaults."""
+        pad = self.n_fft // 2
+        y = np.pad(np.asarray(y, dtype=np.float32), pad)
+        if len(y) < self.n_fft:
+            raise ValueError(f"Signal of {len(y) - 2 * pad} samples is too short for n_fft={self.n_fft}")
+        frames = np.lib.stride_tricks.sliding_window_view(y, self.n_fft)[::self.hop_length]
+        return self.frame_power(frames)
+
+    def mel_and_mfcc(self, y, sr, n_mfcc=128, n_mels=128):
+        """
+        Returns:
+            mel_db: Mel spectrogram in dB relative to its max, shape (n_mels, frames)
+            mfccs: MFCCs, shape (n_mfcc, frames)
+        """
+        with profiler.timer('stft'):
+            S = self.power_spectrogram(y)
+        return self.mel_db_and_mfcc(*self.mel_power(S, sr, n_mels), n_mfcc=n_mfcc)
+
+    def mel_power(self, S, sr, n_mels=128):
+        """
+        Mel power spectrograms for the Mel features and for the MFCCs.
+
+        Returns:
+            mel: shape (n_mels, frames)
+            mfcc_mel: shape (MFCC_N_MELS, frames), the same array when n_mels == MFCC_N_MELS
+        """
+        with profiler.timer('mel'):
+            mel = mel_basis(sr, self.n_fft, n_mels) @ S
+            if n_mels == self.MFCC_N_MELS:
+                return mel, mel
+            return mel, mel_basis(sr, self.n_fft, self.MFCC_N_MELS) @ S
+
+    def mel_db_and_mfcc(self, mel, mfcc_mel, n_mfcc=128):
+        """mel_and_mfcc from the Mel power spectrograms of mel_power."""
+        with profiler.timer('mel'):
+            mel_db = power_to_db(mel, ref=np.max(mel))
+        with profiler.timer('mfcc'):
+            mfccs = dct_matrix(self.MFCC_N_MELS, n_mfcc) @ power_to_db(mfcc_mel)
+        return mel_db, mfccs
+
+    @staticmethod
+    def pooled_blocks(mel_db, mfccs):
+        """
+        Returns:
+            Dictionary with the mfcc_mean, mfcc_std, mel_mean and mel_std blocks
+        """
+        with profiler.timer('pooling'):
+            return {
+                'mfcc_mean': np.mean(mfccs, axis=1),
+                'mfcc_std': np.std(mfccs, axis=1),
+                'mel_mean': np.mean(mel_db, axis=1),
+                'mel_std': np.std(mel_db, axis=1),
+            }
+
+    def feature_blocks(self, y, sr, n_mfcc=128, n_mels=128):
+        """
+        Returns:
+            Dictionary with the mfcc_mean, mfcc_std, mel_mean and mel_std blocks
+        """
+        return self.pooled_blocks(*self.mel_and_mfcc(y, sr, n_mfcc, n_mels))
+
+    def selected_features(self, y, sr, indices, n_mfcc=128, n_mels=128, top_db=80.0):
+        """
+        The given positions of the full extract_features vector
+        (mfcc_mean, mfcc_std, mel_mean, mel_std) without computing the rest:
+        only the needed DCT rows are applied, only the needed Mel bands are
+        converted to dB and pooled, and the MFCC or Mel branch is skipped
+        entirely when nothing from it is selected.
+
+        Args:
+            indices: Positions in the full vector, e.g. AudioClassifier.selected_features
+
+        Returns:
+            Feature vector with len(indices) values, in the order of indices
+        """
+        indices = np.asarray(indices)
+        bounds = np.cumsum([0, n_mfcc, n_mfcc, n_mels, n_mels])
+        block = np.searchsorted(bounds, indices, side='right') - 1
+        offset = indices - bounds[block]
+
+        S = self.power_spectrogram(y)
+        features = np.empty(len(indices))
+        mfcc_mel = None
+
+        if np.any(block < 2):
+            # The DCT mixes every band, so the full 128-band projection is needed
+            mfcc_mel = mel_basis(sr, self.n_fft, self.MFCC_N_MELS) @ S
+            coefs = np.unique(offset[block < 2])
+            mfccs = dct_matrix(self.MFCC_N_MELS, n_mfcc)[coefs] @ power_to_db(mfcc_mel)
+            row = np.searchsorted(coefs, offset)
+            features[block == 0] = mfccs[row[block == 0]].mean(axis=1)
+            features[block == 1] = mfccs[row[block == 1]].std(axis=1)
+
+        if np.any(block >= 2):
+            # The dB reference is the max over all bands, so every band is projected once
+            if mfcc_mel is not None and n_mels == self.MFCC_N_MELS:
+                mel = mfcc_mel
+            else:
+                mel = mel_basis(sr, self.n_fft, n_mels) @ S
+            ref = mel.max()
+            bands = np.unique(offset[block >= 2])
+            mel = mel[bands]
+
+            # power_to_db(mel, ref=max): the loudest value is 0 dB, so top_db clips at -top_db
+            mel_db = np.maximum(10.0 * np.log10(np.maximum(1e-10, mel)) - 10.0 * np.log10(np.maximum(1e-10, ref)), -top_db)
+            row = np.searchsorted(bands, offset)
+            features[block == 2] = mel_db[row[block == 2]].mean(axis=1)
+            features[block == 3] = mel_db[row[block == 3]].std(axis=1)
+
+        return features
+
+    def frame_power(self, frames):
+        """
+        Power spectrogram of already framed audio, matching power_spectrogram
+        for the same frames.
+
+        Args:
+            frames: Array of shape (n_frames, n_fft)
+
+        Returns:
+            Power spectrogram of shape (1 + n_fft // 2, n_frames)
+        """
+        spectrum = np.fft.rfft(frames * hann_window(self.n_fft).astype(np.float32), axis=1)
+        return (spectrum.real ** 2 + spectrum.imag ** 2).T
+
+    def log_mel_frames(self, S, sr, n_mels=128):
+        """
+        Per-frame log Mel powers (dB, ref=1, no top_db clipping) for the Mel
+        features and for the MFCCs. Nothing here depends on other frames, so
+        spectrograms can be processed in pieces and windowed afterwards.
+
+        Returns:
+            mel_log: shape (n_mels, frames)
+            mfcc_mel_log: shape (MFCC_N_MELS, frames), the same array when n_mels == MFCC_N_MELS
+        """
+        mel_log = power_to_db(mel_basis(sr, self.n_fft, n_mels) @ S, top_db=None)
+        if n_mels == self.MFCC_N_MELS:
+            return mel_log, mel_log
+        return mel_log, power_to_db(mel_basis(sr, self.n_fft, self.MFCC_N_MELS) @ S, top_db=None)
+
+    def window_blocks(self, mel_log, mfcc_mel_log, starts, window_frames, gain_db=0.0, n_mfcc=128, top_db=80.0):
+        """
+        Feature blocks for many windows of one spectrogram. Each window gets
+        the same features feature_blocks computes for a clip made of those
+        frames: Mel dB relative to the window max, MFCCs with top_db applied
+        per window.
+
+        Args:
+            mel_log, mfcc_mel_log: Output of log_mel_frames
+            starts: Frame index of every window start
+            window_frames: Frames per window
+            gain_db: Per-window level correction in dB (e.g. peak normalization)
+            n_mfcc: Number of MFCC coefficients
+
+        Returns:
+            Dictionary with the mfcc_mean, mfcc_std, mel_mean and mel_std
+            blocks, each of shape (len(starts), dim)
+        """
+        starts = np.asarray(starts)
+        gain_db = np.broadcast_to(np.asarray(gain_db, dtype=float), starts.shape)[:, None, None]
+
+        def windows(log_spec):
+            # (n_windows, bands, window_frames) view + gain, clipped top_db below each window max
+            view = np.lib.stride_tricks.sliding_window_view(log_spec, window_frames, axis=1)
+            stack = view[:, starts].transpose(1, 0, 2) + gain_db
+            peak = stack.max(axis=(1, 2), keepdims=True)
+            return np.maximum(stack, peak - top_db), peak
+
+        mel_clipped, mel_peak = windows(mel_log)
+        mfcc_mel_db = mel_clipped if mfcc_mel_log is mel_log else windows(mfcc_mel_log)[0]
+        mfccs = np.einsum('km,wmf->wkf', dct_matrix(self.MFCC_N_MELS, n_mfcc), mfcc_mel_db, optimize=True)
+        mel_db = mel_clipped - mel_peak
+
+        return {
+            'mfcc_mean': mfccs.mean(axis=2),
+            'mfcc_std': mfccs.std(axis=2),
+            'mel_mean': mel_db.mean(axis=2),
+            'mel_std': mel_db.std(axis=2),
+        }
+
+    def batch_feature_blocks(self, clips, sr, n_mfcc=128, n_mels=128, max_batch_frames=512):
+        """
+        feature_blocks for many clips at once. Clips are sorted by length and
+        grouped into buckets of similar length, each zero padded into a
+        (batch, samples) array, so STFT, Mel projection and DCT run as a few
+        large array operations. Padding only adds frames past each clip's own
+        end, which are masked out of the max/mean/std; the frames that are
+        kept see exactly the zeros of the centered STFT, so results match
+        feature_blocks.
+
+        Args:
+            clips: List of 1-D waveforms, all at sampling rate sr
+            max_batch_frames: Upper bound on batch size x padded frames. Keeps
+                the windowed frames of a batch (n_fft floats each) cache-sized;
+                past ~1000 frames larger batches get slower, not faster
+
+        Returns:
+            List of feature block dictionaries, in the order of clips
+        """
+        lengths = np.array([len(clip) for clip in clips])
+        order = np.argsort(lengths, kind='stable')
+        results = [None] * len(clips)
+
+        start = 0
+        while start < len(order):
+            # Sorted by length, so the last clip of a bucket sets its padded size
+            end = start + 1
+            while end < len(order) and (end + 1 - start) * (1 + lengths[order[end]] // self.hop_length) <= max_batch_frames:
+                end += 1
+            batch = order[start:end]
+            start = end
+
+            padded = np.zeros((len(batch), lengths[batch].max()), dtype=np.float32)
+            for row, index in enumerate(batch):
+                padded[row, :lengths[index]] = clips[index]
+
+            for index, blocks in zip(batch, self._padded_blocks(padded, lengths[batch], sr, n_mfcc, n_mels)):
+                results[index] = blocks
+
+        return results
+
+    def _padded_blocks(self, padded, lengths, sr, n_mfcc, n_mels, top_db=80.0):
+        # scipy.fft is several times faster than numpy.fft on float32 frames;
+        # it costs ~0.25 s to import, so only bulk extraction pulls it in
+        import scipy.fft
+
+        with profiler.timer('stft'):
+            pad = self.n_fft // 2
+            padded = np.pad(padded, ((0, 0), (pad, pad)))
+            frames = np.lib.stride_tricks.sliding_window_view(padded, self.n_fft, axis=1)[:, ::self.hop_length]
+            spectrum = scipy.fft.rfft(frames * hann_window(self.n_fft).astype(np.float32), axis=2, workers=-1)
+            S = np.swapaxes(spectrum.real ** 2 + spectrum.imag ** 2, 1, 2)   # (batch, bins, frames)
+
+        # Frames of each clip's own centered STFT; the rest only cover padding
+        n_frames = 1 + lengths // self.hop_length
+        valid = (np.arange(S.shape[2]) < n_frames[:, None])[:, None, :]
+        count = n_frames[:, None]
+
+        def log_power(mel):
+            return 10.0 * np.log10(np.maximum(1e-10, mel))
+
+        def masked_max(x):
+            return np.where(valid, x, -np.inf).max(axis=(1, 2), keepdims=True)
+
+        def masked_stats(x):
+            mean = np.where(valid, x, 0).sum(axis=2) / count
+            var = np.where(valid, (x - mean[:, :, None]) ** 2, 0).sum(axis=2) / count
+            return mean, np.sqrt(var)
+
+        with profiler.timer('mel'):
+            mel = mel_basis(sr, self.n_fft, n_mels) @ S
+            mfcc_mel = mel if n_mels == self.MFCC_N_MELS else mel_basis(sr, self.n_fft, self.MFCC_N_MELS) @ S
+
+            # power_to_db per clip: ref=max for the Mel features, ref=1 for the MFCCs
+            mel_log = log_power(mel)
+            mel_log -= 10.0 * np.log10(np.maximum(1e-10, masked_max(mel)))
+            mel_db = np.maximum(mel_log, masked_max(mel_log) - top_db)
+
+        with profiler.timer('mfcc'):
+            mfcc_log = log_power(mfcc_mel)
+            mfcc_log = np.maximum(mfcc_log, masked_max(mfcc_log) - top_db)
+            mfccs = dct_matrix(self.MFCC_N_MELS, n_mfcc) @ mfcc_log
+
+        with profiler.timer('pooling'):
+            mfcc_mean, mfcc_std = masked_stats(mfccs)
+            mel_mean, mel_std = masked_stats(mel_db)
+        return [{'mfcc_mean': mfcc_mean[b], 'mfcc_std': mfcc_std[b], 'mel_mean': mel_mean[b], 'mel_std': mel_std[b]}
+                for b in range(len(lengths))]
@@ -0,0 +1,44 @@
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_selection import mutual_info_classif
+
+class FeatureSelector(BaseEstimator, TransformerMixin):
+    """
+    Keeps the n_features most informative columns of the feature vector.
+
+    Used as the first step of AudioClassifier's pipeline, so selection is
+    refit inside every cross-validation fold and the chosen columns are
+    saved with the model. indices_ (ascending positions in the full
+    extract_features vector) tell FeatureEngine.selected_features which
+    MFCC coefficients and Mel bands inference needs at all.
+    """
+
+    def __init__(self, n_features=64, method='importance', random_state=42):
+        """
+        Args:
+            n_features: Number of columns to keep
+            method: 'importance' (random forest impurity importances) or
+                'mutual_info' (mutual information with the label)
+        """
+        self.n_features = n_features
+        self.method = method
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        X = np.asarray(X)
+        if self.method == 'importance':
+            forest = RandomForestClassifier(n_estimators=100, random_state=self.random_state)
+            scores = forest.fit(X, y).feature_importances_
+        elif self.method == 'mutual_info':
+            scores = mutual_info_classif(X, y, random_state=self.random_state)
+        else:
+            raise ValueError("method must be 'importance' or 'mutual_info'")
+
+        self.scores_ = scores
+        self.indices_ = np.sort(np.argsort(scores)[::-1][:self.n_features])
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def transform(self, X):
+        return np.asarray(X)[:, self.indices_]
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+class FeatureStore:
+    """
+    On-disk store of per-clip feature blocks (mfcc_mean, mfcc_std, mel_mean,
+    mel_std). Entries are .npz files keyed by the audio file content hash and
+    the extraction parameters, so a clip is only ever extracted once per
+    configuration and feature subsets are just column selections.
+    """
+
+    def __init__(self, store_dir='.feature_store'):
+        self.store_dir = store_dir
+
+    def key(self, path, params):
+        """
+        Args:
+            path: Audio file path
+            params: Dictionary of extraction parameters (see DataLoader.extraction_params)
+        """
+        sha = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+        sha.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        return sha.hexdigest()
+
+    def get(self, path, params):
+        """Returns the stored blocks for a clip, or None."""
+        entry = os.path.join(self.store_dir, f"{self.key(path, params)}.npz")
+        if not os.path.exists(entry):
+            return None
+        with np.load(entry) as data:
+            return {name: data[name] for name in data.files}
+
+    def put(self, path, params, blocks):
+        os.makedirs(self.store_dir, exist_ok=True)
+        entry = os.path.join(self.store_dir, f"{self.key(path, params)}.npz")
+
+        # Write then rename so parallel workers never read a partial entry
+        tmp_entry = f"{entry}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_entry, **blocks)
+        os.replace(tmp_entry, entry)
+
+    @staticmethod
+    def select(blocks, names):
+        """
+        Builds a feature matrix from a subset of blocks.
+
+        Args:
+            blocks: Dictionary of block name -> (n_clips, dim) arrays
+            names: Block names to keep, concatenated in this order
+
+        Returns:
+            Feature matrix of shape (n_clips, total dim)
+        """
+        return np.hstack([blocks[name] for name in names])
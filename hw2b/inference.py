@@ -0,0 +1,118 @@
+"""
+Lightweight inference entry point.
+
+Classifies audio files with a forest exported by AudioClassifier.export_forest,
+using numpy only: scikit-learn, librosa, numba, matplotlib and dotenv are never
+imported, so short-lived jobs start in a fraction of the time sample.py needs.
+
+Usage:
+    python inference.py audio_classifier.npz file1.wav [file2.wav ...]
+    python inference.py audio_classifier_forest/ file1.wav [file2.wav ...]
+"""
+
+import json
+import os
+import sys
+import numpy as np
+
+class ForestModel:
+    """Scaler + random forest from AudioClassifier.export_forest, evaluated with numpy."""
+
+    # Arrays that grow with the forest; only these are memory-mapped
+    NODE_TABLES = ('left', 'right', 'feature', 'threshold', 'value')
+
+    def __init__(self, path='audio_classifier.npz', mmap_mode=None):
+        """
+        Args:
+            path: .npz file or directory of .npy files written by export_forest
+            mmap_mode: For a directory, 'r' memory-maps the node tables instead
+                of reading them (ignored for .npz, which cannot be mapped)
+        """
+        if os.path.isdir(path):
+            data = {name[:-4]: np.load(os.path.join(path, name), mmap_mode=mmap_mode if name[:-4] in self.NODE_TABLES else None)
+                    for name in os.listdir(path) if name.endswith('.npy')}
+        else:
+            with np.load(path) as npz:
+                data = {name: npz[name] for name in npz.files}
+
+        self.scaler_factor = data['scaler_factor']
+        self.scaler_shift = data['scaler_shift']
+        self.left = data['left']
+        self.right = data['right']
+        self.feature = data['feature']
+        self.threshold = data['threshold']
+        self.value = data['value']
+        self.roots = data['roots']
+        self.max_depth = int(data['max_depth'])
+        self.classes = data['classes']
+        # Positions of the full feature vector the forest was trained on (None = all)
+        self.selected = data['selected'] if 'selected' in data and data['selected'].size else None
+        self.extraction_params = json.loads(str(data['extraction_params']))
+
+    def predict_proba(self, X):
+        """
+        Args:
+            X: Feature matrix of shape (N, D), unscaled; only the selected
+                columns when the model was trained with feature selection
+
+        Returns:
+            Class probabilities of shape (N, n_classes), averaged over trees.
+            These match scikit-learn except, rarely, for a row whose scaled
+            value falls within rounding of a split: the scaler is applied
+            as x * factor + shift, which can differ from sklearn's own
+            formula in the last bit.
+        """
+        # scikit-learn's trees compare float32 inputs against float64 thresholds
+        X = (np.atleast_2d(X) * self.scaler_factor + self.scaler_shift).astype(np.float32)
+
+        # Walk every (sample, tree) pair down together; leaves point to themselves
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.value[nodes].mean(axis=1)
+
+    def predict(self, X):
+        """
+        Returns:
+            Array of N categories and array of N confidences, like AudioClassifier.predict_batch
+        """
+        proba = self.predict_proba(X)
+        best = np.argmax(proba, axis=1)
+        return self.classes[best], proba[np.arange(len(best)), best]
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Classify audio files with an exported forest.")
+    parser.add_argument("model", help="Forest exported with AudioClassifier.export_forest (.npz or directory)")
+    parser.add_argument("files", nargs="+", help="Audio files to classify")
+    args = parser.parse_args(argv)
+
+    # Only the numpy feature path: data_loader imports librosa lazily, for exotic formats only
+    from data_loader import DataLoader
+    from feature_engine import FeatureEngine
+
+    model = ForestModel(args.model, mmap_mode='r')
+    params = model.extraction_params
+    # Anything not stored falls back to the same defaults training used (e.g. trim_db=20)
+    data_loader = DataLoader(**{key: params[key] for key in ('target_sr', 'max_duration', 'resample_quality', 'trim_db') if key in params})
+    data_loader.feature_engine = FeatureEngine(**{key: params[key] for key in ('n_fft', 'hop_length') if key in params})
+
+    n_mfcc, n_mels = params.get('n_mfcc', 128), params.get('n_mels', 128)
+    X = []
+    for path in args.files:
+        y, sr = data_loader.load_wav_file(path)
+        if model.selected is None:
+            X.append(data_loader.extract_features(y, sr, n_mfcc=n_mfcc, n_mels=n_mels))
+        else:
+            X.append(data_loader.feature_engine.selected_features(y, sr, model.selected, n_mfcc=n_mfcc, n_mels=n_mels))
+
+    categories, confidences = model.predict(np.array(X))
+    for path, category, confidence in zip(args.files, categories, confidences):
+        print(f"Predicted: {category} for file {path} (confidence: {confidence:.4f})")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
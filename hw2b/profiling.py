@@ -0,0 +1,108 @@
+"""
+Stage timers and counters for the hw2b pipeline.
+
+DataLoader, FeatureEngine and AudioClassifier wrap their stages (decode,
+resample, normalize, trim, stft, mel, mfcc, pooling, scale, fit, predict) in
+profiler.timer(...). While the profiler is disabled (the default) a timer
+costs one attribute check; once enabled, time and calls are summed per stage
+across all clips and report() prints the breakdown. Only work done in this
+process is counted, so profile with n_jobs=1.
+
+sample.py turns this on with the profile_timings .env flag, and can also wrap
+the whole run in cProfile (profile_cprofile) or pyinstrument
+(profile_pyinstrument, if installed).
+"""
+
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+class Profiler:
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    @contextmanager
+    def timer(self, stage):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[stage] += time.perf_counter() - start
+            self.calls[stage] += 1
+
+    def count(self, name, n=1):
+        """Adds n to a counter, e.g. clips or samples processed."""
+        if self.enabled:
+            self.counters[name] += n
+
+    def summary(self):
+        return {
+            'stages': {stage: {'calls': self.calls[stage], 'total_s': total} for stage, total in self.totals.items()},
+            'counters': dict(self.counters),
+        }
+
+    def report(self):
+        """Prints per-stage totals, sorted by time, and the counters."""
+        if not self.totals and not self.counters:
+            return
+        grand_total = sum(self.totals.values())
+        print("\n========= Timing breakdown =========")
+        print(f"{'stage':<12} {'calls':>8} {'total (s)':>10} {'mean (ms)':>10} {'share':>7}")
+        for stage, total in sorted(self.totals.items(), key=lambda item: item[1], reverse=True):
+            calls = self.calls[stage]
+            share = total / grand_total if grand_total > 0 else 0.0
+            print(f"{stage:<12} {calls:>8} {total:>10.3f} {total / calls * 1e3:>10.3f} {share:>7.1%}")
+        for name, value in self.counters.items():
+            print(f"{name}: {value}")
+
+    def write(self, path='timings.json'):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"Timings written to {path}")
+
+profiler = Profiler()
+
+@contextmanager
+def cprofile_session(output_path='sample.prof', top=25):
+    """Runs the block under cProfile, saves the stats and prints the top functions by cumulative time."""
+    import cProfile
+    import pstats
+
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield
+    finally:
+        session.disable()
+        session.dump_stats(output_path)
+        pstats.Stats(session).sort_stats('cumulative').print_stats(top)
+        print(f"cProfile stats written to {output_path}")
+
+@contextmanager
+def pyinstrument_session():
+    """Runs the block under pyinstrument and prints its call tree; a no-op if pyinstrument is missing."""
+    try:
+        from pyinstrument import Profiler as SamplingProfiler
+    except ImportError:
+        print("Warning: pyinstrument is not installed, skipping")
+        yield
+        return
+
+    session = SamplingProfiler()
+    session.start()
+    try:
+        yield
+    finally:
+        session.stop()
+        print(session.output_text(unicode=True, color=False))
@@ -1,7 +1,12 @@
 import numpy as np
-import matplotlib.pyplot as plt
+from augmentation import SpectralAugmenter
 from classifier import AudioClassifier
 from data_loader import DataLoader
+from experiment_runner import ExperimentRunner
+from feature_store import FeatureStore
+from segmenter import SegmentClassifier
+from profiling import profiler, cprofile_session, pyinstrument_session
+from contextlib import ExitStack
 from dotenv import load_dotenv
 import os
 
@@ -46,51 +51,25 @@ class Sample():
             {'model_type': 'svm', 'scaler_type': 'robust', 'mfcc_mean': True, 'mfcc_std': True, 'mel_mean': False, 'mel_std': True},
         ]
 
-        data = data_loader.load_wavs("data", classes, n_files=14)  # Load once to avoid repeated I/O
-        for i, fs in enumerate(feature_sets):
-            X, y = data_loader.extract_features_from_data(
-                data,
-                mfcc_mean=fs['mfcc_mean'],
-                mfcc_std=fs['mfcc_std'],
-                mel_mean=fs['mel_mean'],
-                mel_std=fs['mel_std']
-            )
+        # Extract every feature block once (or read it from the store); each
+        # feature set below is then just a column selection
+        blocks, y = data_loader.load_feature_blocks("data", classes, FeatureStore(), n_files=14)
 
-            classifier = AudioClassifier(model_type=fs['model_type'], scaler_type=fs['scaler_type'])
-            classifier.train(X, y, test_size=0.2)
-            feature_sets[i]['accuracy'] = classifier.get_accuracy_score(X, y)
+        # Configurations x folds run in parallel across cores
+        runner = ExperimentRunner(n_folds=5, n_jobs=-1)
+        results = runner.run(blocks, y, feature_sets)
+        runner.write_results(results, 'ablation_results.csv')
 
         print("\n\nAblation Study Results:")
         print("Feature Set\t\t\tAccuracy")
 
-        categories = []
-        accuracies = []
-        for i, fs in enumerate(feature_sets):
-            print(f"Set {i+1}: Model type={fs['model_type']},  MFCC Mean={fs['mfcc_mean']}, MFCC Std={fs['mfcc_std']}, Mel Mean={fs['mel_mean']}, Mel Std={fs['mel_std']}, Accuracy={fs['accuracy']:.4f}")
-            category = f"{fs['model_type']}_{fs['scaler_type']}"
-            if fs['mfcc_mean']:
-                category += "_mfccMean"
-            if fs['mfcc_std']:
-                category += "_mfccStd"
-            if fs['mel_mean']:
-                category += "_melMean"
-            if fs['mel_std']:
-                category += "_melStd"
-
-            categories.append(category)
-            accuracies.append(fs['accuracy'])
-
-        # Bar plot
-        sorted_data = sorted(zip(accuracies, categories), reverse=True)
-        sorted_values = [item[0] for item in sorted_data]
-        sorted_categories = [item[1] for item in sorted_data]
-        plt.figure(figsize=(12, 6))
-        plt.barh(sorted_categories, sorted_values, color='skyblue')
-        plt.xlabel('Accuracy')
-        plt.title('Ablation Study: Impact of Different Feature Sets on Accuracy')
-        plt.xlim(0, 1)
-        plt.tight_layout()
-        plt.show()
+        for i, fs in enumerate(results):
+            print(f"Set {i+1}: Model type={fs['model_type']},  MFCC Mean={fs['mfcc_mean']}, MFCC Std={fs['mfcc_std']}, Mel Mean={fs['mel_mean']}, Mel Std={fs['mel_std']}, "
+                  f"Accuracy={fs['accuracy_mean']:.4f} (+/- {fs['accuracy_std']:.4f}), Fit={fs['fit_time'] * 1000:.1f}ms, Predict={fs['predict_time'] * 1000:.1f}ms")
+
+        # Bar plot, saved to a file so the study never blocks on a window
+        if self.get_env_flag("plot_ablation_study"):
+            runner.plot_results(results, 'ablation_study.png')
 
     def predict_on_test_files(self, data_loader, classifier):
         print("\n========= Evaluation on new audio files =========")
@@ -109,46 +88,88 @@ class Sample():
             category, confidence = classifier.predict(features)
             print(f"\nPredicted: {category} for file {test_audio} (confidence: {confidence:.4f})")
 
+    def classify_long_files(self, data_loader, classifier):
+        print("\n========= Segment-level classification of long recordings =========")
+        long_audios = [
+            "data/microwave/micro-long2.wav",
+            "data/clothes/clothes-long.wav",
+            "data/microwave/microwave-long.wav",
+            "data/music/music-long2-sp010.wav"
+        ]
+
+        segmenter = SegmentClassifier(classifier, data_loader, window_seconds=5.0, hop_seconds=1.0)
+        for long_audio in long_audios:
+            segments, change_points = segmenter.timeline(segmenter.classify_file(long_audio))
+            print(f"\n{long_audio}: {len(segments)} segments, change-points at {[round(t, 1) for t in change_points]}")
+            for segment in segments:
+                confidence = f"{segment['confidence']:.4f}" if segment['confidence'] is not None else "n/a"
+                print(f"  {segment['start']:8.1f}s - {segment['end']:8.1f}s  {segment['label']:<12} (confidence: {confidence})")
+
 if __name__ == "__main__":
 
     load_dotenv()
     sample = Sample()
 
-    # Load data
-    directory_path = "data/blender/wavs"
-    data_loader = DataLoader()
-    classes = ["blender", "clothes", "dish-washer", "microwave", "music"]
-
-    print("Loading dataset...")
-    X, y = data_loader.prepare_data("data", classes, 20) # Limit to 14 files per class because we only have 14 microwave samples
-
-    print(f"\nDataset: {len(X)} samples, {X.shape[1]} features")
-    print(f"Classes: {np.unique(y)}")
-
-    # Initialize classifier
-    classifier = AudioClassifier(model_type='random_forest', scaler_type='robust')
-
-    # Train
-    classifier.train(X, y, test_size=0.2)
-
-    # Cross-validation analysis
-    perform_cross_validation_analysis = sample.get_env_flag("perform_cross_validation_analysis")
-    if perform_cross_validation_analysis:
-        print("\n========= Cross-validation analysis =========")
-        classifier.cross_validate_analysis(X, y, n_folds=10)
-
-    # Save model
-    save_model = sample.get_env_flag("save_model")
-    if save_model:
-        classifier.save_model('audio_classifier.pkl')
-
-    # Evaluate on files not on training set
-    preform_predict_on_test_files = sample.get_env_flag("perform_predict_on_test_files")
-    if preform_predict_on_test_files:
-        sample.predict_on_test_files(data_loader, classifier)
-
-    # Ablation study: impact of different feature sets
-
-    perform_ablation_study = sample.get_env_flag("perform_ablation_study")
-    if perform_ablation_study:
-        sample.ablation_study()
+    # Per-stage timings (decode, resample, features, scaling, fit, predict) and whole-run profilers
+    profile_timings = sample.get_env_flag("profile_timings")
+    profiler.enabled = profile_timings
+    with ExitStack() as profiling:
+        if sample.get_env_flag("profile_cprofile"):
+            profiling.enter_context(cprofile_session('sample.prof'))
+        if sample.get_env_flag("profile_pyinstrument"):
+            profiling.enter_context(pyinstrument_session())
+
+        # Load data
+        directory_path = "data/blender/wavs"
+        data_loader = DataLoader()
+        classes = ["blender", "clothes", "dish-washer", "microwave", "music"]
+
+        print("Loading dataset...")
+        # Spectral-domain augmentation: extra rows per clip from its cached spectrograms
+        augmenter = SpectralAugmenter(n_augment=10, n_mixup=5) if sample.get_env_flag("augment_training_data") else None
+        X, y, groups = data_loader.prepare_data("data", classes, 20, augmenter=augmenter, return_groups=True) # Limit to 14 files per class because we only have 14 microwave samples
+
+        print(f"\nDataset: {len(X)} samples, {X.shape[1]} features")
+        print(f"Classes: {np.unique(y)}")
+
+        # Initialize classifier
+        classifier = AudioClassifier(model_type='random_forest', scaler_type='robust')
+
+        # Train
+        classifier.train(X, y, test_size=0.2, groups=groups if augmenter is not None else None, augmenter=augmenter)
+
+        # Cross-validation analysis
+        perform_cross_validation_analysis = sample.get_env_flag("perform_cross_validation_analysis")
+        if perform_cross_validation_analysis:
+            print("\n========= Cross-validation analysis =========")
+            classifier.cross_validate_analysis(X, y, n_folds=10, n_jobs=-1, groups=groups if augmenter is not None else None)
+
+        # Save model
+        save_model = sample.get_env_flag("save_model")
+        if save_model:
+            classifier.save_model('audio_classifier.pkl')
+
+        # Plain-numpy forest for inference.py, which starts without sklearn/librosa
+        export_inference_model = sample.get_env_flag("export_inference_model")
+        if export_inference_model:
+            classifier.export_forest('audio_classifier.npz', data_loader.extraction_params())
+
+        # Evaluate on files not on training set
+        preform_predict_on_test_files = sample.get_env_flag("perform_predict_on_test_files")
+        if preform_predict_on_test_files:
+            sample.predict_on_test_files(data_loader, classifier)
+
+        # Timeline of labels over long recordings, classified in overlapping windows
+        perform_segment_classification = sample.get_env_flag("perform_segment_classification")
+        if perform_segment_classification:
+            sample.classify_long_files(data_loader, classifier)
+
+        # Ablation study: impact of different feature sets
+
+        perform_ablation_study = sample.get_env_flag("perform_ablation_study")
+        if perform_ablation_study:
+            sample.ablation_study()
+
+    if profile_timings:
+        profiler.report()
+        profiler.write('timings.json')
@@ -0,0 +1,187 @@
+"""
+Segment-level classification of long recordings.
+
+A recording is streamed from disk in blocks, turned into STFT frames once, and
+every overlapping analysis window is described by pooling the frames it
+covers (FeatureEngine.window_blocks), so no window is ever re-transformed.
+Windows are classified in batches and merged into a timeline of labelled
+segments. Only the frames of windows not yet emitted are kept in memory, so
+memory does not grow with the recording length.
+"""
+
+import numpy as np
+from feature_engine import FeatureEngine
+
+class SegmentClassifier:
+
+    def __init__(self, classifier, data_loader, window_seconds=5.0, hop_seconds=1.0, batch_size=64, n_mfcc=128, n_mels=128):
+        """
+        Args:
+            classifier: Trained AudioClassifier (on full extract_features vectors)
+            data_loader: DataLoader providing target_sr, the feature engine and file streaming
+            window_seconds: Length of each classified window
+            hop_seconds: Distance between window starts (rounded to whole STFT hops)
+            batch_size: Windows classified per predict_batch call
+        """
+        self.classifier = classifier
+        self.data_loader = data_loader
+        self.engine = data_loader.feature_engine
+        self.sr = data_loader.target_sr
+        self.n_mfcc = n_mfcc
+        self.n_mels = n_mels
+        self.batch_size = batch_size
+
+        hop = self.engine.hop_length
+        self.window_frames = max(1, int(round(window_seconds * self.sr / hop)))
+        self.hop_frames = max(1, int(round(hop_seconds * self.sr / hop)))
+
+    def frame_stream(self, blocks):
+        """
+        Turns audio blocks into batches of frame features, equivalent to a
+        centered (zero padded) STFT of the concatenated audio.
+
+        Yields:
+            mel_log, mfcc_mel_log: Log Mel frames, see FeatureEngine.log_mel_frames
+            peak_db: Per-frame sample peak in dB, used for per-window peak normalization
+        """
+        n_fft, hop = self.engine.n_fft, self.engine.hop_length
+        pad = np.zeros(n_fft // 2, dtype=np.float32)
+
+        buffer = pad
+        n_samples = 0
+        for block in blocks:
+            n_samples += len(block)
+            buffer = np.concatenate([buffer, block])
+            n_frames = 1 + (len(buffer) - n_fft) // hop if len(buffer) >= n_fft else 0
+            if n_frames > 0:
+                yield self._frame_features(buffer, n_frames)
+                buffer = buffer[n_frames * hop:]
+
+        # Trailing frames reach into the end padding like librosa.stft(center=True)
+        buffer = np.concatenate([buffer, pad])
+        n_frames = 1 + (len(buffer) - n_fft) // hop if len(buffer) >= n_fft else 0
+        if n_samples > 0 and n_frames > 0:
+            yield self._frame_features(buffer, n_frames)
+
+    def _frame_features(self, buffer, n_frames):
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.engine.n_fft)[::self.engine.hop_length][:n_frames]
+        S = self.engine.frame_power(frames)
+        mel_log, mfcc_mel_log = self.engine.log_mel_frames(S, self.sr, self.n_mels)
+        peak_db = 20.0 * np.log10(np.maximum(np.abs(frames).max(axis=1), 1e-10))
+        return mel_log, mfcc_mel_log, peak_db
+
+    def window_features(self, blocks):
+        """
+        Feature vectors of every window of the audio in blocks.
+
+        Yields:
+            start_frames: Frame index of each window start in the batch
+            window_frames: Frames per window (fewer than self.window_frames
+                only for a recording shorter than one window)
+            X: Feature matrix of shape (len(start_frames), D)
+        """
+        shared = self.n_mels == FeatureEngine.MFCC_N_MELS
+        mel = mfcc_mel = peaks = None
+        offset = 0        # Absolute frame index of the first buffered frame
+        next_start = 0    # Absolute frame index of the next window start
+
+        def ready(final=False):
+            # Full batches only, so the model is not called for a handful of windows per block
+            n_frames = offset + mel.shape[1]
+            starts = np.arange(next_start, n_frames - self.window_frames + 1, self.hop_frames)[:self.batch_size]
+            return starts if len(starts) == self.batch_size or (final and len(starts) > 0) else None
+
+        for mel_part, mfcc_part, peak_part in self.frame_stream(blocks):
+            if mel is None:
+                mel, mfcc_mel, peaks = mel_part, mfcc_part, peak_part
+            else:
+                mel = np.concatenate([mel, mel_part], axis=1)
+                mfcc_mel = mel if shared else np.concatenate([mfcc_mel, mfcc_part], axis=1)
+                peaks = np.concatenate([peaks, peak_part])
+
+            while (starts := ready()) is not None:
+                yield starts, self.window_frames, self._batch(mel, mfcc_mel, peaks, starts - offset)
+                next_start = starts[-1] + self.hop_frames
+
+            # Drop frames no future window can use
+            drop = min(next_start - offset, mel.shape[1])
+            mel, peaks = mel[:, drop:], peaks[drop:]
+            mfcc_mel = mel if shared else mfcc_mel[:, drop:]
+            offset += drop
+
+        if mel is None or mel.shape[1] == 0:
+            return
+
+        while (starts := ready(final=True)) is not None:
+            yield starts, self.window_frames, self._batch(mel, mfcc_mel, peaks, starts - offset)
+            next_start = starts[-1] + self.hop_frames
+
+        # A recording shorter than one window is classified as a single clip
+        if next_start == 0:
+            yield np.array([0]), mel.shape[1], self._batch(mel, mfcc_mel, peaks, np.array([0]), mel.shape[1])
+
+    def _batch(self, mel, mfcc_mel, peaks, starts, window_frames=None):
+        window_frames = window_frames or self.window_frames
+        # Peak normalization (load_wav_file) shifts every log power by -peak dB
+        peak_view = np.lib.stride_tricks.sliding_window_view(peaks, window_frames)
+        gain_db = -peak_view[starts].max(axis=1)
+        blocks = self.engine.window_blocks(mel, mfcc_mel, starts, window_frames, gain_db, self.n_mfcc)
+        return np.hstack([blocks[name] for name in FeatureEngine.BLOCK_NAMES])
+
+    def classify_blocks(self, blocks):
+        """
+        Classifies every window of an audio block stream.
+
+        Returns:
+            List of (start seconds, end seconds, label, confidence) per window
+        """
+        frame_seconds = self.engine.hop_length / self.sr
+        results = []
+        for starts, window_frames, X in self.window_features(blocks):
+            categories, confidences = self.classifier.predict_batch(X)
+            if confidences is None:
+                confidences = [None] * len(categories)
+            for start, category, confidence in zip(starts, categories, confidences):
+                results.append((start * frame_seconds, (start + window_frames) * frame_seconds, category, confidence))
+        return results
+
+    def classify_file(self, path):
+        """Classifies every window of an audio file of any length, see classify_blocks."""
+        return self.classify_blocks(self.data_loader.stream_resampled(path))
+
+    @staticmethod
+    def timeline(windows):
+        """
+        Merges consecutive windows with the same label into segments. Each
+        window stands for the span around its center up to the neighbouring
+        centers, so boundaries (change-points) fall halfway between the last
+        window of one label and the first window of the next.
+
+        Args:
+            windows: Output of classify_file / classify_blocks
+
+        Returns:
+            segments: List of dicts with start, end, label, confidence (mean over windows) and n_windows
+            change_points: Times in seconds where the label changes
+        """
+        if not windows:
+            return [], []
+
+        centers = [(start + end) / 2 for start, end, _, _ in windows]
+        bounds = [windows[0][0]] + [(a + b) / 2 for a, b in zip(centers, centers[1:])] + [windows[-1][1]]
+
+        segments = []
+        for i, (_, _, label, confidence) in enumerate(windows):
+            if segments and segments[-1]['label'] == label:
+                segment = segments[-1]
+                segment['end'] = float(bounds[i + 1])
+                segment['confidences'].append(confidence)
+            else:
+                segments.append({'start': float(bounds[i]), 'end': float(bounds[i + 1]), 'label': label, 'confidences': [confidence]})
+
+        for segment in segments:
+            confidences = segment.pop('confidences')
+            segment['n_windows'] = len(confidences)
+            segment['confidence'] = None if confidences[0] is None else float(np.mean(confidences))
+
+        return segments, [float(segment['start']) for segment in segments[1:]]
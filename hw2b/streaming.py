@@ -0,0 +1,98 @@
+from collections import deque
+import numpy as np
+
+class StreamingClassifier:
+    """
+    Classifies an audio stream in overlapping windows.
+
+    Audio is pushed in arbitrary chunks (at the DataLoader's target rate).
+    Every hop_seconds a window of window_seconds is normalized like
+    load_wav_file, turned into features and classified; all windows that
+    became ready in one push are classified in a single batch. Labels are
+    smoothed by averaging class probabilities over the last `smoothing`
+    windows (or by majority vote for models without probabilities).
+    """
+
+    def __init__(self, classifier, data_loader, window_seconds=5.0, hop_seconds=1.0, smoothing=3):
+        """
+        Args:
+            classifier: Trained AudioClassifier
+            data_loader: DataLoader used for features (and its target_sr)
+            window_seconds: Length of each classified window
+            hop_seconds: Distance between window starts
+            smoothing: Number of recent windows combined for each emitted label
+        """
+        self.classifier = classifier
+        self.data_loader = data_loader
+        self.sr = data_loader.target_sr
+        self.window = int(window_seconds * self.sr)
+        self.hop = int(hop_seconds * self.sr)
+        if self.window <= 0 or self.hop <= 0:
+            raise ValueError("window_seconds and hop_seconds must each cover at least one sample")
+        self.history = deque(maxlen=smoothing)
+
+        self.buffer = np.zeros(0, dtype=np.float32)
+        # Absolute sample index of buffer[0]
+        self.buffer_start = 0
+
+    def push(self, chunk):
+        """
+        Adds audio to the stream.
+
+        Args:
+            chunk: 1-D float array at target_sr
+
+        Returns:
+            List of (start time in seconds, label, confidence) for every
+            window completed by this chunk
+        """
+        self.buffer = np.concatenate([self.buffer, np.asarray(chunk, dtype=np.float32)])
+
+        windows = []
+        starts = []
+        offset = 0
+        while offset + self.window <= len(self.buffer):
+            windows.append(self.buffer[offset : offset + self.window])
+            starts.append(self.buffer_start + offset)
+            offset += self.hop
+
+        # Keep only what later windows still need
+        self.buffer = self.buffer[offset:]
+        self.buffer_start += offset
+
+        if not windows:
+            return []
+
+        X = np.array([self.window_features(w) for w in windows])
+        return [(start / self.sr, *self.smooth(x)) for start, x in zip(starts, self._batch_scores(X))]
+
+    def window_features(self, window):
+        peak = np.max(np.abs(window))
+        if peak > 0:
+            window = window / peak
+        return self.data_loader.extract_features(window, self.sr)
+
+    def _batch_scores(self, X):
+        """
+        One probability row per window, in label_encoder.classes_ order. Models
+        without probabilities give one-hot rows, so smoothing is a majority vote.
+        """
+        if hasattr(self.classifier.model, 'predict_proba'):
+            proba = self.classifier.pipeline.predict_proba(X)
+            scores = np.zeros((len(X), len(self.classifier.label_encoder.classes_)))
+            scores[:, self.classifier.model.classes_] = proba
+            return scores
+
+        predictions = self.classifier.pipeline.predict(X)
+        return np.eye(len(self.classifier.label_encoder.classes_))[predictions]
+
+    def smooth(self, scores):
+        self.history.append(scores)
+        mean = np.mean(self.history, axis=0)
+        best = int(np.argmax(mean))
+        return self.classifier.label_encoder.classes_[best], float(mean[best])
+
+    def process(self, chunks):
+        """Generator version of push over an iterable of chunks."""
+        for chunk in chunks:
+            yield from self.push(chunk)
@@ -0,0 +1,23 @@
+import warnings
+import numpy as np
+from sklearn.datasets import make_classification
+from classifier import AudioClassifier
+
+def test_train_after_partial_fit_refits_the_forest():
+    X, y = make_classification(n_samples=300, n_features=20, n_informative=10, n_classes=3, random_state=0)
+    classifier = AudioClassifier(model_type='random_forest', scaler_type='standard')
+    classifier.fit(X[:100], y[:100])
+    classifier.partial_fit(X[100:200], y[100:200], n_new_trees=20)
+    assert len(classifier.model.estimators_) == 120
+    updated_trees = list(classifier.model.estimators_)
+
+    # Shifted data: stale trees under a refit scaler would do badly here
+    X_new = X[200:] + 5.0
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        classifier.train(X_new, y[200:], test_size=0.2)
+
+    assert not classifier.model.warm_start
+    assert len(classifier.model.estimators_) == classifier.model.n_estimators
+    assert not any(tree is old for tree in classifier.model.estimators_ for old in updated_trees)
+    assert classifier.score(X_new, y[200:]) > 0.9
@@ -0,0 +1,27 @@
+import numpy as np
+import soundfile as sf
+from data_loader import DataLoader
+from synthetic_data import synthesize_clip
+
+def test_trimming_removes_silence_padding(tmp_path):
+    data_loader = DataLoader(trim_db=20)
+    hop = data_loader.feature_engine.hop_length
+    rng = np.random.default_rng(0)
+
+    # Quiet edges below the threshold, so the trim lands inside the clip itself
+    quiet = lambda n: 3e-3 * synthesize_clip('music', n / 16000, 16000, rng)
+    clip = np.concatenate([quiet(4000), synthesize_clip('music', 1.0, 16000, rng), quiet(4000)]).astype(np.float32)
+    # A whole number of hops of leading silence keeps the STFT frames aligned
+    padded = np.concatenate([np.zeros(16 * hop, np.float32), clip, np.zeros(5000, np.float32)])
+
+    trimmed = {}
+    for name, samples in [('clip', clip), ('padded', padded)]:
+        path = tmp_path / f"{name}.wav"
+        sf.write(path, samples, 16000, subtype='FLOAT')
+        trimmed[name], _ = data_loader.load_wav_file(str(path))
+
+    engine = data_loader.feature_engine
+    n_frames = engine.power_spectrogram(trimmed['padded']).shape[1]
+    assert n_frames == engine.power_spectrogram(trimmed['clip']).shape[1]
+    assert n_frames < 1 + len(clip) // hop
+    np.testing.assert_array_equal(data_loader.extract_features(trimmed['padded'], 16000), data_loader.extract_features(trimmed['clip'], 16000))
@@ -0,0 +1,107 @@
+import cv2
+import numpy as np
+
+class CameraChannel:
+    """
+    Simulates the screen-to-camera channel for rendered HiLight frames.
+
+    - Distance: the screen shrinks to (reference_cm / distance_cm) of the
+      camera frame and the rest is a dark surround, which lowers the
+      modulation depth of the average intensity
+    - Blur: Gaussian blur whose sigma grows with distance (defocus)
+    - Noise: additive Gaussian sensor noise, plus a per-frame global
+      exposure jitter that does not average out over the screen
+    - Frame drops: each frame is lost with probability drop_rate
+    - Camera frame rate: the display is sampled at camera_fps (sample and
+      hold), e.g. 59.94, 120 or 240 fps against a 60 Hz screen
+
+    The random generator is seeded so runs are reproducible.
+    """
+
+    # Noise frames drawn up front and reused, drawing fresh Gaussian noise
+    # for every frame dominates the rendering time otherwise
+    NOISE_BANK_SIZE = 16
+
+    def __init__(self, distance_cm=20, reference_cm=20, blur_per_cm=0.02, noise_std=2.0,
+                 exposure_jitter=0.5, drop_rate=0.0, surround_intensity=20, camera_fps=None,
+                 display_fps=60, seed=0):
+        self.distance_cm = distance_cm
+        self.reference_cm = reference_cm
+        self.blur_per_cm = blur_per_cm
+        self.noise_std = noise_std
+        self.exposure_jitter = exposure_jitter
+        self.drop_rate = drop_rate
+        self.surround_intensity = surround_intensity
+        self.camera_fps = camera_fps
+        self.display_fps = display_fps
+        self.rng = np.random.default_rng(seed)
+
+    def place_screen(self, frame):
+        """Shrinks the screen inside a dark surround according to distance."""
+        scale = min(1.0, self.reference_cm / self.distance_cm)
+        if scale >= 1.0:
+            return frame
+
+        height, width = frame.shape[:2]
+        small_w = max(1, int(round(width * scale)))
+        small_h = max(1, int(round(height * scale)))
+        small = cv2.resize(frame, (small_w, small_h), interpolation=cv2.INTER_AREA)
+
+        canvas = np.full_like(frame, self.surround_intensity)
+        top = (height - small_h) // 2
+        left = (width - small_w) // 2
+        canvas[top : top + small_h, left : left + small_w] = small
+        return canvas
+
+    def sample(self, frames):
+        """
+        Samples displayed frames at the camera frame rate. A display frame
+        is captured zero, one or several times depending on how many camera
+        exposures start while it is on screen.
+        """
+        if self.camera_fps is None:
+            yield from frames
+            return
+
+        # Random phase between the screen refresh and the camera shutter
+        phase = self.rng.random() / self.camera_fps
+        capture = 0
+        for i, frame in enumerate(frames):
+            frame_end = (i + 1) / self.display_fps
+            while phase + capture / self.camera_fps < frame_end:
+                yield frame
+                capture += 1
+
+    def apply(self, frames):
+        """
+        Passes frames through the simulated channel.
+
+        Args:
+            frames: Iterable of BGR uint8 frames
+
+        Yields:
+            Degraded BGR uint8 frames, dropped frames are skipped
+        """
+        sigma = self.blur_per_cm * self.distance_cm
+        noise_bank = None
+
+        for frame in self.sample(frames):
+            if self.drop_rate > 0 and self.rng.random() < self.drop_rate:
+                continue
+
+            frame = self.place_screen(frame)
+
+            if sigma > 0:
+                frame = cv2.GaussianBlur(frame, (0, 0), sigma)
+
+            if self.noise_std > 0:
+                if noise_bank is None:
+                    noise_bank = self.rng.normal(0.0, self.noise_std, (self.NOISE_BANK_SIZE,) + frame.shape).astype(np.float32)
+                noise = noise_bank[self.rng.integers(self.NOISE_BANK_SIZE)]
+                frame = cv2.add(frame, noise, dtype=cv2.CV_8U)
+
+            if self.exposure_jitter > 0:
+                offset = self.rng.normal(0.0, self.exposure_jitter)
+                frame = cv2.convertScaleAbs(frame, alpha=1.0, beta=offset)
+
+            yield frame
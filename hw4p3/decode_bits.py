@@ -4,15 +4,21 @@ import numpy as np
 import argparse
 from scipy.fft import fft
 import sys
+from link_layer import LinkLayer
+from transmitter import HiLightTransmitter
+from series_cache import SeriesCache
 
 class HiLightReceiver:
-    def __init__(self, video_path, ground_truth_path, grid_rows=1, grid_cols=1):
+    def __init__(self, video_path, ground_truth_path, grid_rows=1, grid_cols=1, cache=None):
         print("Video Path:", video_path)
         self.video_path = video_path
         self.ground_truth_path = ground_truth_path
         self.grid_rows = grid_rows
         self.grid_cols = grid_cols
 
+        # Optional SeriesCache, lets repeated runs skip reading the video
+        self.cache = cache
+
         # HiLight Constants from the paper
         self.SAMPLING_WINDOW = 6  # 6 frames per bit
         self.FPS_REQUIREMENT = 60 # System relies on 60Hz refresh [cite: 192]
@@ -27,6 +33,8 @@ class HiLightReceiver:
         self.FREQ_0 = 20
         self.FREQ_1 = 30
 
+        self.link_layer = LinkLayer()
+
     def load_ground_truth(self):
         """Loads expected bits from a text file (e.g., '10110')."""
         try:
@@ -69,14 +77,19 @@ class HiLightReceiver:
         Decodes a bit using FFT on the intensity buffer[cite: 410].
         Bit 0: 20Hz dominant
         Bit 1: 30Hz dominant
+
+        The buffer may also be (window, cells) when the screen is split into
+        a grid, in which case the magnitudes of all cells are combined.
         """
         # FFT
         N = len(intensity_buffer)
-        yf = fft(intensity_buffer)
+        yf = fft(np.asarray(intensity_buffer), axis=0)
         xf = np.fft.fftfreq(N, 1 / self.FPS_REQUIREMENT)
 
         # Get magnitudes
         magnitudes = np.abs(yf)
+        if magnitudes.ndim > 1:
+            magnitudes = magnitudes.sum(axis=1)
 
         # Find indices for 20Hz and 30Hz
         # In a 6-point FFT at 60Hz:
@@ -84,9 +97,10 @@ class HiLightReceiver:
         # Index 1: 10Hz
         # Index 2: 20Hz
         # Index 3: 30Hz (Nyquist)
+        # Other window sizes pick the bins closest to FREQ_0 / FREQ_1
 
-        power_20hz = magnitudes[2]
-        power_30hz = magnitudes[3]
+        power_20hz = magnitudes[np.argmin(np.abs(np.abs(xf) - self.FREQ_0))]
+        power_30hz = magnitudes[np.argmin(np.abs(np.abs(xf) - self.FREQ_1))]
 
         #  Bit 0 -> 20Hz, Bit 1 -> 30Hz
         if power_30hz > power_20hz:
@@ -94,7 +108,13 @@ class HiLightReceiver:
         else:
             return 0
 
-    def process_video(self):
+    def read_frames(self):
+        """
+        Opens the video and yields (frame, timestamp in seconds) pairs.
+
+        Returns:
+            Generator of frames and the fps reported by the container
+        """
         cap = cv2.VideoCapture(self.video_path)
 
         if not cap.isOpened():
@@ -106,36 +126,123 @@ class HiLightReceiver:
         if fps < 55:
             print(f"Warning: Video FPS is {fps}. HiLight requires ~60 FPS for correct 20/30Hz BFSK.")
 
-        decoded_bits = []
-        intensity_buffer = []
-        prev_frame = None
+        def frames():
+            while cap.isOpened():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            cap.release()
 
-        frame_count = 0
+        return frames(), fps
+
+    def extract_series(self, frames=None, fps=None):
+        """
+        Reads the video once and records, for every frame, the average
+        intensity, the dp/dh scene metrics against the previous frame and
+        the frame timestamp.
+
+        Args:
+            frames: Optional iterable of in-memory BGR frames (e.g. from the
+                offline transmitter) used instead of the video file
+            fps: Frame rate of `frames`, required when frames is given
 
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
+        Returns:
+            Dictionary of numpy arrays plus the reported fps
+        """
+        if frames is None:
+            timed_frames, fps = self.read_frames()
+        else:
+            timed_frames = ((frame, i / fps) for i, frame in enumerate(frames))
+
+        intensities = []
+        cell_intensities = []
+        dps = []
+        dhs = []
+        timestamps = []
+        prev_frame = None
 
+        for frame, timestamp in timed_frames:
             # Convert to grayscale for intensity [cite: 41]
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
-            # Scene Detection Logic
             if prev_frame is not None:
-                dp = self.calculate_dp(prev_frame, gray)
-                dh = self.calculate_dh(prev_frame, gray)
-
-                # Check for Cut Scene [cite: 330]
-                if dp > self.DP_CUT_THRESHOLD and dh > self.DH_CUT_THRESHOLD:
-                    # [cite: 408] Receiver discards frame window if cut scene detected
-                    intensity_buffer = []
-                    prev_frame = gray
-                    continue
+                dps.append(self.calculate_dp(prev_frame, gray))
+                dhs.append(self.calculate_dh(prev_frame, gray))
+            else:
+                dps.append(0.0)
+                dhs.append(0.0)
 
             # Calculate average intensity of the screen (assuming full frame is screen for simplicity)
             # In a real scenario, we would split this into grids [cite: 344]
-            avg_intensity = np.mean(gray)
-            intensity_buffer.append(avg_intensity)
+            intensities.append(np.mean(gray))
+            timestamps.append(timestamp)
+
+            if self.grid_rows * self.grid_cols > 1:
+                # Area interpolation down to the grid gives the mean of each cell
+                cells = cv2.resize(gray.astype(np.float32), (self.grid_cols, self.grid_rows), interpolation=cv2.INTER_AREA)
+                cell_intensities.append(cells.reshape(-1))
+
+            prev_frame = gray
+
+        series = {
+            'intensity': np.array(intensities),
+            'dp': np.array(dps),
+            'dh': np.array(dhs),
+            'timestamps': np.array(timestamps),
+            'fps': fps,
+        }
+        if cell_intensities:
+            series['cell_intensity'] = np.array(cell_intensities)
+
+        return series
+
+    def lock_symbol_timing(self, intensity):
+        """
+        Finds the frame offset of the bit boundaries by correlating the
+        intensity series against the modulated link layer preamble.
+
+        Returns:
+            Offset in frames, between 0 and SAMPLING_WINDOW - 1
+        """
+        template = HiLightTransmitter(delta_alpha=1.0).bits_to_alpha(LinkLayer.PREAMBLE, lead_in=False)
+        if len(intensity) < len(template):
+            return 0
+
+        # The communication layer is black, so a high alpha darkens the screen
+        template = -(template - np.mean(template))
+
+        # Remove the slowly varying background content before correlating
+        trend = np.convolve(intensity, np.ones(self.SAMPLING_WINDOW) / self.SAMPLING_WINDOW, mode='same')
+        scores = np.correlate(intensity - trend, template, mode='valid')
+
+        return int(np.argmax(scores)) % self.SAMPLING_WINDOW
+
+    def decode_series(self, series, offset=0):
+        """
+        Decodes bits from a series produced by extract_series.
+
+        Args:
+            series: Output of extract_series
+            offset: Number of frames to skip so windows line up with bit boundaries
+
+        Returns:
+            Decoded bits and the number of frames used (cut frames excluded)
+        """
+        decoded_bits = []
+        intensity_buffer = []
+        frame_count = 0
+        samples = series.get('cell_intensity', series['intensity'])
+
+        for i in range(offset, len(samples)):
+            # Scene Detection Logic
+            # Check for Cut Scene [cite: 330]
+            if i > 0 and series['dp'][i] > self.DP_CUT_THRESHOLD and series['dh'][i] > self.DH_CUT_THRESHOLD:
+                # [cite: 408] Receiver discards frame window if cut scene detected
+                intensity_buffer = []
+                continue
+
+            intensity_buffer.append(samples[i])
 
             # Use sliding window or fixed window?
             # The paper implies sliding window voting[cite: 413], but for simplicity
@@ -146,11 +253,154 @@ class HiLightReceiver:
                 # Reset buffer (or slide) - Here we reset for fixed window decoding
                 intensity_buffer = []
 
-            prev_frame = gray
             frame_count += 1
 
-        cap.release()
-        return np.array(decoded_bits), frame_count / fps
+        return np.array(decoded_bits), frame_count
+
+    def frame_times(self, series):
+        """
+        Frame timestamps in seconds. Falls back to index / fps when the
+        container did not report usable timestamps.
+        """
+        t = np.asarray(series.get('timestamps', []), dtype=np.float64)
+        n = len(series['intensity'])
+        if len(t) != n or n < 2 or np.any(np.diff(t) <= 0):
+            t = np.arange(n) / series['fps']
+        return t
+
+    def measured_fps(self, series):
+        t = self.frame_times(series)
+        if len(t) < 2:
+            return series['fps']
+        return 1.0 / np.median(np.diff(t))
+
+    def bit_powers(self, t, samples, bit_index, n_bits, freq):
+        """
+        Non-uniform DFT magnitude at `freq` for every bit, evaluated at the
+        actual sample times so any camera frame rate lands exactly on the
+        20/30 Hz tones. The mean of each bit is removed first (like ignoring
+        the DC bin) and grid cells are combined by summing magnitudes.
+        """
+        samples = samples.reshape(len(samples), -1)
+        cos = np.cos(2 * np.pi * freq * t)[:, None]
+        sin = np.sin(2 * np.pi * freq * t)[:, None]
+
+        counts = np.bincount(bit_index, minlength=n_bits)[:, None]
+        shape = (n_bits, samples.shape[1])
+        sums = np.zeros(shape)
+        re = np.zeros(shape)
+        im = np.zeros(shape)
+        np.add.at(sums, bit_index, samples)
+        np.add.at(re, bit_index, samples * cos)
+        np.add.at(im, bit_index, samples * sin)
+
+        means = sums / np.maximum(counts, 1)
+        re -= means * np.bincount(bit_index, weights=cos[:, 0], minlength=n_bits)[:, None]
+        im -= means * np.bincount(bit_index, weights=sin[:, 0], minlength=n_bits)[:, None]
+
+        return np.hypot(re, im).sum(axis=1)
+
+    def decode_series_adaptive(self, series, lock_timing=True):
+        """
+        Decodes bits using the measured frame timestamps instead of assuming
+        exactly FPS_REQUIREMENT frames per second. Each bit lasts
+        SAMPLING_WINDOW / FPS_REQUIREMENT seconds of transmitter time and
+        gets however many camera frames fall inside it, so 59.94 fps
+        recordings do not drift and 120/240 fps recordings average more
+        samples per bit.
+
+        Returns:
+            Decoded bits and the number of frames used (cut frames excluded)
+        """
+        t = self.frame_times(series)
+        samples = np.asarray(series.get('cell_intensity', series['intensity']), dtype=np.float64)
+        if len(t) == 0:
+            return np.array([], dtype=int), 0
+
+        # [cite: 408] Frames after a cut scene are not used
+        cuts = (np.asarray(series['dp']) > self.DP_CUT_THRESHOLD) & (np.asarray(series['dh']) > self.DH_CUT_THRESHOLD)
+        cuts[0] = False
+
+        bit_period = self.SAMPLING_WINDOW / self.FPS_REQUIREMENT
+        samples_per_bit = bit_period * self.measured_fps(series)
+
+        def decode_from(start):
+            bit_index = np.floor((t - start) / bit_period).astype(int)
+            keep = bit_index >= 0
+            n_bits = bit_index[keep].max() + 1 if np.any(keep) else 0
+            if n_bits == 0:
+                return np.array([], dtype=int), np.zeros(0), np.zeros(0, dtype=bool)
+
+            power_0 = self.bit_powers(t[keep], samples[keep], bit_index[keep], n_bits, self.FREQ_0)
+            power_1 = self.bit_powers(t[keep], samples[keep], bit_index[keep], n_bits, self.FREQ_1)
+
+            # Drop bits that saw a cut or were only partially recorded
+            counts = np.bincount(bit_index[keep], minlength=n_bits)
+            usable = counts >= 0.5 * samples_per_bit
+            usable[np.unique(bit_index[keep & cuts])] = False
+
+            return (power_1 > power_0).astype(int), np.abs(power_1 - power_0), usable
+
+        start = t[0]
+        if lock_timing:
+            # Try bit boundaries across one bit period and keep the one where
+            # the two tones are best separated
+            n_phases = max(self.SAMPLING_WINDOW, int(np.ceil(samples_per_bit)))
+            candidates = t[0] + np.arange(n_phases) * bit_period / n_phases
+            scores = []
+            for candidate in candidates:
+                _, separation, usable = decode_from(candidate)
+                scores.append(separation[usable].sum())
+            start = candidates[int(np.argmax(scores))]
+
+        bits, _, usable = decode_from(start)
+        return bits[usable], int(np.sum(~cuts & (t >= start)))
+
+    def load_series(self):
+        """
+        Returns the series for the video, from the cache when available.
+        """
+        if self.cache is None:
+            return self.extract_series()
+
+        series = self.cache.load(self.video_path, self.grid_rows, self.grid_cols)
+        if series is not None:
+            print("Loaded intensity series from cache")
+            return series
+
+        series = self.extract_series()
+        path = self.cache.save(self.video_path, series, self.grid_rows, self.grid_cols)
+        print(f"Saved intensity series to {path}")
+        return series
+
+    def process_video(self, lock_timing=False, frames=None, fps=None, adaptive=False):
+        if frames is None:
+            self.series = self.load_series()
+        else:
+            self.series = self.extract_series(frames, fps)
+
+        if adaptive:
+            fps = self.measured_fps(self.series)
+            print(f"Measured {fps:.2f} FPS, {fps * self.SAMPLING_WINDOW / self.FPS_REQUIREMENT:.1f} frames per bit")
+            decoded_bits, frame_count = self.decode_series_adaptive(self.series)
+            return decoded_bits, frame_count / fps
+
+        offset = 0
+        if lock_timing:
+            offset = self.lock_symbol_timing(self.series['intensity'])
+            print(f"Symbol timing locked at frame offset {offset}")
+
+        decoded_bits, frame_count = self.decode_series(self.series, offset)
+        return decoded_bits, frame_count / self.series['fps']
+
+    def compute_link_metrics(self, decoded_bits, duration_seconds):
+        """
+        Parses link layer frames out of the decoded bits and reports goodput.
+        """
+        frames = [f for f in self.link_layer.parse_frames(decoded_bits) if not f['spurious']]
+        goodput, frame_error_rate = self.link_layer.compute_goodput(frames, duration_seconds)
+        corrected = sum(f['corrected'] for f in frames)
+        return len(frames), frame_error_rate, goodput, corrected
 
     def save_bits_to_file(self, bits, output_path):
         """Writes the decoded bit array to a file as a string (e.g. '10110')."""
@@ -173,26 +423,14 @@ class HiLightReceiver:
 
         # Synchronization: Find best alignment minimizing bit errors
         # Because video might start recording before/after transmission starts
-        best_accuracy = 0.0
         max_overlap = min(len(decoded_bits), len(true_bits))
+        sub_true = np.asarray(true_bits[:max_overlap], dtype=int)
 
-        # Sweep to find best offset
-        for offset in range(len(decoded_bits) - max_overlap + 1):
-            sub_decoded = decoded_bits[offset : offset + max_overlap]
-            sub_true = true_bits[:len(sub_decoded)]
-
-            matches = np.sum(sub_decoded == sub_true)
-            acc = matches / len(sub_true)
-            if acc > best_accuracy:
-                best_accuracy = acc
-
-        # Try checking if true bits are inside decoded bits (lead-in noise)
-        for offset in range(len(decoded_bits) - len(true_bits) + 1):
-             sub_decoded = decoded_bits[offset : offset + len(true_bits)]
-             matches = np.sum(sub_decoded == true_bits)
-             acc = matches / len(true_bits)
-             if acc > best_accuracy:
-                best_accuracy = acc
+        # Sweep every offset at once: with bits mapped to +-1 the correlation at
+        # each offset is matches - mismatches, so matches = (overlap + score) / 2.
+        # This also covers the true bits sitting inside the decoded bits (lead-in noise)
+        scores = np.correlate(2 * np.asarray(decoded_bits, dtype=int) - 1, 2 * sub_true - 1, mode='valid')
+        best_accuracy = (max_overlap + np.max(scores)) / 2 / max_overlap
 
         # Bit Error Rate = 1 - Accuracy
         ber = 1.0 - best_accuracy
@@ -211,13 +449,18 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Calculate BER and Data Rate for HiLight.")
     parser.add_argument("--video", type=str, required=True, help="Path to video file")
     parser.add_argument("--bits", type=str, required=True, help="Path to ground truth bits file")
+    parser.add_argument("--framed", action="store_true", help="Lock timing on the preamble and report link layer goodput")
+    parser.add_argument("--adaptive", action="store_true", help="Decode from measured frame timestamps (any camera frame rate)")
+    parser.add_argument("--cache-dir", type=str, default=".series_cache", help="Intensity series cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Always decode the video from scratch")
 
     args = parser.parse_args()
 
-    receiver = HiLightReceiver(args.video, args.bits)
+    cache = None if args.no_cache else SeriesCache(args.cache_dir)
+    receiver = HiLightReceiver(args.video, args.bits, cache=cache)
 
     print("Processing video...")
-    decoded_bits, duration = receiver.process_video()
+    decoded_bits, duration = receiver.process_video(lock_timing=args.framed, adaptive=args.adaptive)
 
     base_name = os.path.splitext(args.video)[0]
     output_path = f"{base_name}_decoded.txt"
@@ -233,4 +476,12 @@ if __name__ == "__main__":
     print("-" * 30)
     print(f"Bit Error Rate (BER): {ber:.4f}")
     print(f"Data Rate:            {data_rate:.2f} bps")
-    print("-" * 30)
\ No newline at end of file
+    print("-" * 30)
+
+    if args.framed:
+        n_frames, frame_error_rate, goodput, corrected = receiver.compute_link_metrics(decoded_bits, duration)
+        print(f"Frames found:         {n_frames}")
+        print(f"Frame Error Rate:     {frame_error_rate:.4f}")
+        print(f"Corrected codewords:  {corrected}")
+        print(f"Goodput:              {goodput:.2f} bps")
+        print("-" * 30)
@@ -0,0 +1,215 @@
+import numpy as np
+
+class LinkLayer:
+    """
+    Packet framing for the HiLight link.
+
+    A frame on the wire looks like:
+        [preamble (13 bits)] [Hamming(7,4) coded: length (8) | payload (8 * length) | CRC-16 (16)]
+
+    The preamble is sent uncoded so the receiver can find it by correlation,
+    everything after it is protected by a Hamming(7,4) code and the CRC tells
+    us whether the frame survived.
+    """
+
+    # Barker-13, good autocorrelation so a single peak marks the frame start
+    PREAMBLE = np.array([1, 1, 1, 1, 1, 0, 0, 1, 1, 0, 1, 0, 1])
+
+    # Maximum preamble bit errors tolerated when searching for frames
+    PREAMBLE_MAX_ERRORS = 1
+
+    # CRC-16-CCITT
+    CRC_POLY = 0x1021
+    CRC_INIT = 0xFFFF
+
+    # Systematic Hamming(7,4): codeword = [d1 d2 d3 d4 p1 p2 p3]
+    HAMMING_P = np.array([
+        [1, 1, 0],
+        [1, 0, 1],
+        [0, 1, 1],
+        [1, 1, 1],
+    ])
+    HAMMING_G = np.hstack([np.eye(4, dtype=int), HAMMING_P])
+    HAMMING_H = np.hstack([HAMMING_P.T, np.eye(3, dtype=int)])
+
+    def __init__(self):
+        # Syndrome (as an integer) -> index of the bit to flip, -1 if no error
+        self.syndrome_table = np.full(8, -1)
+        for position in range(7):
+            syndrome = self.HAMMING_H[:, position]
+            self.syndrome_table[self._bits_to_int(syndrome)] = position
+
+    @staticmethod
+    def _bits_to_int(bits):
+        value = 0
+        for b in bits:
+            value = (value << 1) | int(b)
+        return value
+
+    @staticmethod
+    def bytes_to_bits(data):
+        """Big-endian bit expansion of a bytes object."""
+        return np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8)).astype(int)
+
+    @staticmethod
+    def bits_to_bytes(bits):
+        return np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes()
+
+    def crc16(self, data):
+        """CRC-16-CCITT over a bytes object."""
+        crc = self.CRC_INIT
+        for byte in data:
+            crc ^= byte << 8
+            for _ in range(8):
+                if crc & 0x8000:
+                    crc = ((crc << 1) ^ self.CRC_POLY) & 0xFFFF
+                else:
+                    crc = (crc << 1) & 0xFFFF
+        return crc
+
+    def hamming_encode(self, bits):
+        """
+        Encodes a bit array whose length is a multiple of 4.
+        All nibbles are encoded at once with a single matrix product.
+        """
+        nibbles = np.asarray(bits, dtype=int).reshape(-1, 4)
+        return ((nibbles @ self.HAMMING_G) % 2).reshape(-1)
+
+    def hamming_decode(self, bits):
+        """
+        Decodes a bit array whose length is a multiple of 7, correcting one
+        error per codeword.
+
+        Returns:
+            Decoded data bits and the number of corrected codewords
+        """
+        codewords = np.asarray(bits, dtype=int).reshape(-1, 7).copy()
+        syndromes = (codewords @ self.HAMMING_H.T) % 2
+        syndrome_ids = syndromes @ np.array([4, 2, 1])
+        error_positions = self.syndrome_table[syndrome_ids]
+
+        rows = np.nonzero(error_positions >= 0)[0]
+        codewords[rows, error_positions[rows]] ^= 1
+
+        return codewords[:, :4].reshape(-1), len(rows)
+
+    def build_frame(self, payload):
+        """
+        Builds the bit sequence for one frame.
+
+        Args:
+            payload: bytes, at most 255 of them
+
+        Returns:
+            Numpy array of bits ready to be modulated
+        """
+        payload = bytes(payload)
+        if len(payload) > 255:
+            raise ValueError("payload must be at most 255 bytes")
+
+        crc = self.crc16(payload)
+        body = bytes([len(payload)]) + payload + crc.to_bytes(2, 'big')
+        coded = self.hamming_encode(self.bytes_to_bits(body))
+        return np.concatenate([self.PREAMBLE, coded])
+
+    def build_stream(self, payloads):
+        """Concatenates frames for a list of payloads."""
+        return np.concatenate([self.build_frame(p) for p in payloads])
+
+    def find_preambles(self, bits):
+        """
+        Correlates the decoded bit stream against the preamble.
+
+        Returns:
+            Indices where a preamble starts (within PREAMBLE_MAX_ERRORS bit errors)
+        """
+        bits = np.asarray(bits, dtype=int)
+        n = len(self.PREAMBLE)
+        if len(bits) < n:
+            return np.array([], dtype=int)
+
+        # Bipolar correlation: score == n means a perfect match, each bit error costs 2
+        bipolar = 2 * bits - 1
+        template = 2 * self.PREAMBLE - 1
+        scores = np.correlate(bipolar, template, mode='valid')
+        return np.nonzero(scores >= n - 2 * self.PREAMBLE_MAX_ERRORS)[0]
+
+    def parse_frames(self, bits):
+        """
+        Extracts frames from a decoded bit stream.
+
+        Returns:
+            List of dicts with the frame start index, the payload bytes,
+            whether the CRC passed, how many codewords were corrected and
+            whether the candidate is spurious: a CRC failure whose claimed
+            span overlaps a CRC-valid frame or an earlier kept candidate, i.e.
+            most likely a false preamble match rather than a lost frame
+        """
+        bits = np.asarray(bits, dtype=int)
+        frames = []
+        next_free = 0
+        header_len = 2 * 7  # One length byte = two Hamming codewords
+
+        for start in self.find_preambles(bits):
+            if start < next_free:
+                continue
+
+            body_start = start + len(self.PREAMBLE)
+            header = bits[body_start : body_start + header_len]
+            if len(header) < header_len:
+                # A later candidate may still be a real frame
+                continue
+
+            header_bits, _ = self.hamming_decode(header)
+            length = self._bits_to_int(header_bits)
+
+            coded_len = (8 + 8 * length + 16) // 4 * 7
+            coded = bits[body_start : body_start + coded_len]
+            if len(coded) < coded_len:
+                # Likely a false preamble match with a garbage length byte
+                continue
+
+            data_bits, corrected = self.hamming_decode(coded)
+            body = self.bits_to_bytes(data_bits)
+            payload = body[1 : 1 + length]
+            crc_ok = self.crc16(payload) == int.from_bytes(body[1 + length :], 'big')
+
+            frames.append({
+                'start': int(start),
+                'end': int(body_start + coded_len),
+                'payload': payload,
+                'crc_ok': crc_ok,
+                'corrected': corrected,
+                'spurious': False,
+            })
+
+            # Only skip past the frame when we trust it, otherwise a false
+            # preamble match could swallow a real frame
+            if crc_ok:
+                next_free = body_start + coded_len
+
+        # CRC-valid frames claim their span first, failed candidates then keep
+        # theirs left to right if it is still free
+        kept = [(f['start'], f['end']) for f in frames if f['crc_ok']]
+        for frame in frames:
+            if frame['crc_ok']:
+                continue
+            if any(frame['start'] < end and start < frame['end'] for start, end in kept):
+                frame['spurious'] = True
+            else:
+                kept.append((frame['start'], frame['end']))
+
+        return frames
+
+    def compute_goodput(self, frames, duration_seconds):
+        """
+        Effective goodput: payload bits from CRC-valid frames per second.
+        Spurious candidates (see parse_frames) do not count towards the
+        frame error rate.
+        """
+        frames = [f for f in frames if not f['spurious']]
+        good = [f for f in frames if f['crc_ok']]
+        good_bits = 8 * sum(len(f['payload']) for f in good)
+        frame_error_rate = 1.0 - len(good) / len(frames) if frames else 1.0
+        goodput = good_bits / duration_seconds if duration_seconds > 0 else 0.0
+        return goodput, frame_error_rate
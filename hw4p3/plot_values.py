@@ -2,11 +2,14 @@ import csv
 import matplotlib.pyplot as plt
 import sys
 
+# Optional path to a results file (e.g. the output of sweep.py)
+results_path = sys.argv[1] if len(sys.argv) > 1 else 'results.csv'
+
 # Data structure to hold points: { alpha_value: [(cm, ber, dr), ...] }
 data_by_alpha = {}
 
 try:
-    with open('results.csv', 'r') as f:
+    with open(results_path, 'r') as f:
         reader = csv.reader(f)
 
         # Skip the header row (alpha,cm,BER,DR)
@@ -32,7 +35,7 @@ try:
                 print(f"Skipping invalid row: {row}")
 
 except FileNotFoundError:
-    print("Error: 'results.csv' not found.")
+    print(f"Error: '{results_path}' not found.")
     sys.exit()
 
 # Sort the data by distance (cm) for each alpha to ensure lines connect correctly
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+
+class SeriesCache:
+    """
+    On-disk cache of the per-frame series produced by
+    HiLightReceiver.extract_series (intensity, dp/dh traces, timestamps),
+    keyed by the video content hash and the grid used for extraction.
+    Decoding parameters (thresholds, window) are applied afterwards, so they
+    never invalidate an entry.
+
+    Each entry is a directory with one .npy file per array plus a meta.json,
+    and arrays are opened memory-mapped so loading is nearly free and
+    parallel workers share the same pages.
+    """
+
+    HASH_INDEX = 'hash_index.json'
+
+    def __init__(self, cache_dir='.series_cache'):
+        self.cache_dir = cache_dir
+
+    def video_hash(self, video_path, chunk_size=1 << 20):
+        """
+        Content hash of the video. Hashes are remembered per (path, size,
+        mtime) so an unchanged video is never read twice.
+        """
+        stat = os.stat(video_path)
+        index_key = f"{os.path.abspath(video_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        index_path = os.path.join(self.cache_dir, self.HASH_INDEX)
+        index = {}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r') as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+
+        if index_key in index:
+            return index[index_key]
+
+        sha = hashlib.sha256()
+        with open(video_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        index[index_key] = digest
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+
+        return digest
+
+    def entry_path(self, video_path, grid_rows=1, grid_cols=1):
+        key = f"{self.video_hash(video_path)[:32]}_{grid_rows}x{grid_cols}"
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, video_path, grid_rows=1, grid_cols=1):
+        """Returns the cached series, or None when the video was never extracted."""
+        path = self.entry_path(video_path, grid_rows, grid_cols)
+        if not os.path.exists(path):
+            return None
+        return self.load_entry(path)
+
+    @staticmethod
+    def load_entry(path):
+        """Loads a cache entry by path, skipping the video hash."""
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+
+        series = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in meta['arrays']}
+        series['fps'] = meta['fps']
+        return series
+
+    def save(self, video_path, series, grid_rows=1, grid_cols=1):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.entry_path(video_path, grid_rows, grid_cols)
+
+        # Write to a temporary directory first so concurrent workers never
+        # read a half-written entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+
+        arrays = [name for name, value in series.items() if isinstance(value, np.ndarray)]
+        for name in arrays:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), series[name])
+
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'fps': float(series['fps']), 'arrays': arrays}, f)
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another worker stored the same entry first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        return path
@@ -0,0 +1,136 @@
+"""
+Parameter sweep over recorded HiLight videos.
+
+The manifest is a JSON file:
+{
+    "videos": [
+        {"video": "alpha_0.1_20_cm.mp4", "bits": "transmitted_bits.txt", "alpha": 0.1, "cm": 20},
+        ...
+    ],
+    "params": {
+        "window": [6],
+        "dp_threshold": [100],
+        "dh_threshold": [1.0],
+        "grid": [[1, 1]]
+    }
+}
+
+Every (video, grid) pair is decoded exactly once into the series cache, then
+each parameter combination is decoded from the cache in a process pool.
+Rows are appended to the CSV as soon as they finish; the first four columns
+match results.csv so plot_values.py can read the output directly.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decode_bits import HiLightReceiver
+from series_cache import SeriesCache
+
+FIELDNAMES = ['alpha', 'cm', 'BER', 'DR', 'goodput', 'FER', 'window', 'dp_threshold', 'dh_threshold',
+              'grid_rows', 'grid_cols', 'video']
+
+DEFAULT_PARAMS = {
+    'window': [6],
+    'dp_threshold': [100],
+    'dh_threshold': [1.0],
+    'grid': [[1, 1]],
+}
+
+def extract_job(video_path, grid_rows, grid_cols, cache_dir):
+    """Extracts one (video, grid) series into the cache unless it is already there."""
+    cache = SeriesCache(cache_dir)
+    entry = cache.entry_path(video_path, grid_rows, grid_cols)
+    if not os.path.exists(entry):
+        receiver = HiLightReceiver(video_path, None, grid_rows, grid_cols)
+        cache.save(video_path, receiver.extract_series(), grid_rows, grid_cols)
+    return entry
+
+def decode_job(entry, video, params):
+    """Decodes a cached series with one parameter combination."""
+    series = SeriesCache.load_entry(entry)
+
+    grid_rows, grid_cols = params['grid']
+    receiver = HiLightReceiver(video['video'], video['bits'], grid_rows, grid_cols)
+    receiver.SAMPLING_WINDOW = params['window']
+    receiver.DP_CUT_THRESHOLD = params['dp_threshold']
+    receiver.DH_CUT_THRESHOLD = params['dh_threshold']
+
+    decoded_bits, frame_count = receiver.decode_series(series)
+    duration = frame_count / series['fps']
+
+    ber, data_rate = receiver.compute_metrics(decoded_bits, receiver.load_ground_truth(), duration)
+    _, frame_error_rate, goodput, _ = receiver.compute_link_metrics(decoded_bits, duration)
+
+    return {
+        'alpha': video['alpha'],
+        'cm': video['cm'],
+        'BER': round(float(ber), 4),
+        'DR': round(float(data_rate), 2),
+        'goodput': round(goodput, 2),
+        'FER': round(frame_error_rate, 4),
+        'window': params['window'],
+        'dp_threshold': params['dp_threshold'],
+        'dh_threshold': params['dh_threshold'],
+        'grid_rows': grid_rows,
+        'grid_cols': grid_cols,
+        'video': video['video'],
+    }
+
+def expand_params(params):
+    """Cartesian product of the parameter lists in the manifest."""
+    params = {**DEFAULT_PARAMS, **params}
+    names = list(DEFAULT_PARAMS.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*(params[n] for n in names))]
+
+def run_sweep(manifest, output_path, cache_dir='.series_cache', workers=None):
+    videos = manifest['videos']
+    combinations = expand_params(manifest.get('params', {}))
+    grids = sorted({tuple(c['grid']) for c in combinations})
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Stage 1: one extraction per (video, grid)
+        extract_futures = {
+            pool.submit(extract_job, v['video'], rows, cols, cache_dir): (v['video'], (rows, cols))
+            for v in videos for rows, cols in grids
+        }
+        entries = {}
+        for future in as_completed(extract_futures):
+            entries[extract_futures[future]] = future.result()
+        print(f"Series cache ready for {len(entries)} (video, grid) pairs")
+
+        # Stage 2: every parameter combination from the cache
+        decode_futures = [
+            pool.submit(decode_job, entries[(v['video'], tuple(c['grid']))], v, c)
+            for v in videos for c in combinations
+        ]
+
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            for i, future in enumerate(as_completed(decode_futures), 1):
+                writer.writerow(future.result())
+                f.flush()
+                print(f"[{i}/{len(decode_futures)}] results written to {output_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep HiLight receiver parameters over a set of videos.")
+    parser.add_argument("--manifest", type=str, required=True, help="Path to the sweep manifest (JSON)")
+    parser.add_argument("--output", type=str, default="sweep_results.csv", help="Output CSV path")
+    parser.add_argument("--overwrite", action="store_true", help="Replace the output file if it already exists")
+    parser.add_argument("--cache-dir", type=str, default=".series_cache", help="Intensity series cache directory")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+
+    args = parser.parse_args()
+
+    # results.csv holds the hand-collected measurements, never clobber a file by accident
+    if os.path.exists(args.output) and not args.overwrite:
+        parser.error(f"{args.output} already exists, pass --overwrite to replace it")
+
+    with open(args.manifest, 'r') as f:
+        manifest = json.load(f)
+
+    run_sweep(manifest, args.output, args.cache_dir, args.workers)
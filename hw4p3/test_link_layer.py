@@ -0,0 +1,36 @@
+import numpy as np
+from link_layer import LinkLayer
+
+def fake_preamble(link, length):
+    """A preamble followed by a length byte but no frame body."""
+    return np.concatenate([link.PREAMBLE, link.hamming_encode(link.bytes_to_bits(bytes([length])))])
+
+def test_false_preamble_running_past_the_stream_keeps_the_real_frame():
+    link = LinkLayer()
+    stream = np.concatenate([fake_preamble(link, 200), link.build_frame(b"hello")])
+    frames = [f for f in link.parse_frames(stream) if f['crc_ok']]
+    assert [f['payload'] for f in frames] == [b"hello"]
+
+def test_false_preamble_overlapping_a_frame_is_not_a_frame_error():
+    link = LinkLayer()
+    stream = np.concatenate([fake_preamble(link, 3), link.build_frame(b"hello")])
+    frames = link.parse_frames(stream)
+    assert [(f['crc_ok'], f['spurious']) for f in frames] == [(False, True), (True, False)]
+
+    goodput, frame_error_rate = link.compute_goodput(frames, duration_seconds=2.0)
+    assert frame_error_rate == 0.0
+    assert goodput == 8 * len(b"hello") / 2.0
+
+def test_corrupted_frame_counts_as_a_frame_error():
+    link = LinkLayer()
+    first = link.build_frame(b"hello")
+    # Two flipped bits in one codeword are beyond Hamming(7,4)
+    first[len(link.PREAMBLE) + 21] ^= 1
+    first[len(link.PREAMBLE) + 22] ^= 1
+    stream = np.concatenate([first, link.build_frame(b"world")])
+    frames = link.parse_frames(stream)
+
+    assert not any(f['spurious'] for f in frames)
+    assert [f['crc_ok'] for f in frames] == [False, True]
+    _, frame_error_rate = link.compute_goodput(frames, duration_seconds=1.0)
+    assert frame_error_rate == 0.5
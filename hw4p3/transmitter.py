@@ -0,0 +1,154 @@
+import argparse
+import cv2
+import numpy as np
+from link_layer import LinkLayer
+
+class HiLightTransmitter:
+    """
+    Python reference of the BFSK transmitter in Transmitter.html.
+    Produces the per-frame alpha of the black communication layer and can
+    render it over a background offline, without a browser or a camera.
+    """
+
+    FPS = 60
+    FRAMES_PER_BIT = 6
+
+    # 0 = 20Hz (Period = 3 frames @ 60fps) -> High, Low, Low
+    # 1 = 30Hz (Period = 2 frames @ 60fps) -> High, Low
+    PATTERNS = {
+        0: [1, 0, 0, 1, 0, 0],
+        1: [1, 0, 1, 0, 1, 0],
+    }
+
+    # Same "Lead-in" as the HTML transmitter (6 frames at full delta alpha)
+    LEAD_IN_FRAMES = 6
+
+    def __init__(self, delta_alpha=0.1):
+        self.delta_alpha = delta_alpha
+        self.link_layer = LinkLayer()
+
+    def encode_message(self, message, payload_size=32):
+        """
+        Splits a message into link layer frames.
+
+        Args:
+            message: bytes or str
+            payload_size: Maximum payload bytes per frame
+
+        Returns:
+            Bit array of all frames back to back
+        """
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+
+        payloads = [message[i : i + payload_size] for i in range(0, len(message), payload_size)]
+        return self.link_layer.build_stream(payloads)
+
+    def bits_to_alpha(self, bits, lead_in=True):
+        """
+        Maps bits to the opacity of the communication layer for every frame.
+        """
+        bits = np.asarray(bits, dtype=int)
+        patterns = np.array([self.PATTERNS[0], self.PATTERNS[1]])
+        alphas = patterns[bits].reshape(-1) * self.delta_alpha
+
+        if lead_in:
+            alphas = np.concatenate([np.full(self.LEAD_IN_FRAMES, self.delta_alpha), alphas])
+
+        return alphas
+
+    def load_background_video(self, video_path, width=320, height=240):
+        """
+        Yields frames of a background video resized to (width, height),
+        looping forever so any transmission length can be covered.
+        """
+        while True:
+            cap = cv2.VideoCapture(video_path)
+            if not cap.isOpened():
+                print(f"Error: Could not open background video {video_path}.")
+                return
+
+            frame_count = 0
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frame_count += 1
+                yield cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+            cap.release()
+            if frame_count == 0:
+                return
+
+    def render_frames(self, alphas, background=None, width=320, height=240):
+        """
+        Blends the black communication layer over a background.
+        Frames are yielded one at a time so long transmissions do not have
+        to fit in memory.
+
+        Args:
+            alphas: Per-frame opacity of the communication layer
+            background: BGR uint8 image, an iterable of BGR frames (e.g.
+                load_background_video) or None for a mid-gray frame
+
+        Yields:
+            BGR uint8 frames of shape (height, width, 3)
+        """
+        if background is None:
+            background = np.full((height, width, 3), 128, dtype=np.uint8)
+
+        if isinstance(background, np.ndarray):
+            # Only a couple of distinct alphas are ever used, blend each once
+            blended = {}
+            for alpha in alphas:
+                if alpha not in blended:
+                    blended[alpha] = np.clip(np.rint(background * (1.0 - alpha)), 0, 255).astype(np.uint8)
+                yield blended[alpha]
+            return
+
+        for alpha, frame in zip(alphas, background):
+            yield cv2.convertScaleAbs(frame, alpha=1.0 - alpha)
+
+    def write_video(self, frames, output_path):
+        out = None
+        frame_count = 0
+
+        for frame in frames:
+            if out is None:
+                height, width = frame.shape[:2]
+                fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+                out = cv2.VideoWriter(output_path, fourcc, self.FPS, (width, height))
+                if not out.isOpened():
+                    print(f"Error: Could not open {output_path} for writing.")
+                    return
+            out.write(frame)
+            frame_count += 1
+
+        if out is not None:
+            out.release()
+        print(f"Successfully wrote {frame_count} frames to {output_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render HiLight test frames offline.")
+    parser.add_argument("--message", type=str, required=True, help="Text to transmit")
+    parser.add_argument("--alpha", type=float, default=0.1, help="Delta alpha of the communication layer")
+    parser.add_argument("--payload-size", type=int, default=32, help="Payload bytes per frame")
+    parser.add_argument("--video", type=str, default="synthetic.avi", help="Output video path")
+    parser.add_argument("--bits", type=str, default="synthetic_bits.txt", help="Output ground truth bits path")
+    parser.add_argument("--background", type=str, default=None, help="Optional background video to blend over")
+
+    args = parser.parse_args()
+
+    transmitter = HiLightTransmitter(delta_alpha=args.alpha)
+    bits = transmitter.encode_message(args.message, payload_size=args.payload_size)
+
+    with open(args.bits, 'w') as f:
+        f.write(''.join(map(str, bits)))
+    print(f"Saved {len(bits)} ground truth bits to {args.bits}")
+
+    background = None
+    if args.background:
+        background = transmitter.load_background_video(args.background)
+
+    frames = transmitter.render_frames(transmitter.bits_to_alpha(bits), background)
+    transmitter.write_video(frames, args.video)